@@ -1,5 +1,8 @@
+import time
+start_time = time.perf_counter()
+
 from src.app import EightPuzzle
 
 if __name__ == '__main__':
-    app = EightPuzzle()
+    app = EightPuzzle(start_time=start_time)
     app.mainloop()
@@ -0,0 +1,36 @@
+from src.utils import Board, algorithm, A_STAR, A_STAR_INCREMENTAL, WEIGHTED_A_STAR, GREEDY, ANYTIME_A_STAR, IDA_STAR, BFS, BIDIRECTIONAL_BFS
+from src.database import DATABASE, get_database
+from src.heuristics import get_heuristic
+from src.vectorized import VECTORIZED_BFS
+
+ALGORITHMS = [
+    algorithm('A*', A_STAR),
+    algorithm('incremental A*', A_STAR_INCREMENTAL),
+    algorithm('weighted A*', WEIGHTED_A_STAR),
+    algorithm('greedy best-first', GREEDY),
+    algorithm('anytime A*', ANYTIME_A_STAR),
+    algorithm('IDA*', IDA_STAR),
+    algorithm('IDA* + linear conflict', IDA_STAR, 'linear conflict'),
+    algorithm('IDA* + walking distance', IDA_STAR, 'walking distance'),
+    algorithm('IDA* + pattern database', IDA_STAR, 'pattern database'),
+    algorithm('BFS', BFS),
+    algorithm('bidirectional BFS', BIDIRECTIONAL_BFS),
+    algorithm('vectorized BFS', VECTORIZED_BFS),
+    algorithm('database', DATABASE)
+]
+
+def get_algorithm(name):
+    """Returns the registered algorithm of a name"""
+    for registered in ALGORITHMS:
+        if registered.name == name:
+            return registered
+    raise KeyError(f'unknown algorithm {name!r}')
+
+def warm_up(width=3):
+    """Loads the tables of every registered algorithm ahead of its first solve"""
+    Board.puzzle(width)
+    for registered in ALGORITHMS:
+        if isinstance(registered.heuristic, str):
+            get_heuristic(registered.heuristic, width)
+    if width == 3:
+        get_database()
@@ -1,16 +1,23 @@
 import os
-import tkinter as tk
 import time
+import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 from threading import Thread
+from collections import deque
 
 from src.config import *
-from src.utils import algorithm, Board, A_STAR, BFS
+from src.utils import Board, SearchTask, Solution
+from src.algorithms import ALGORITHMS, warm_up
+from src.cache import SolutionCache, CACHE_PATH
+from src.hints import HintOracle
 
 class EightPuzzle(tk.Tk):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, start_time=None, **kwargs):
         tk.Tk.__init__(self, *args, **kwargs)
+        # startup phases are printed relative to when run.py started, or to now
+        self.start_time = start_time or time.perf_counter()
+        self.log_startup('window created')
+        
         self.title('8-Puzzle Game')
         self.geometry('750x750')
         self.resizable(False, False)
@@ -23,6 +30,45 @@ class EightPuzzle(tk.Tk):
         self.container.grid_columnconfigure(0, weight=1)
         
         self.show_frame(PuzzlePage, **BASIC_FRAME_PROPERTIES)
+        self.log_startup('widgets built')
+        self.after_idle(lambda: self.log_startup('window shown'))
+        
+        # solver tables load on a background thread, so the first solve does not pay for them
+        Thread(target=self.warm_up, daemon=True).start()
+    
+    def log_startup(self, phase):
+        print(f'Startup: {phase} after {round(time.perf_counter() - self.start_time, 4)} second(s)')
+    
+    def warm_up(self):
+        warm_up()
+        self.log_startup('solver tables loaded')
+    
+    def load_tile_images(self):
+        # tiles are cut from one pre-decoded atlas, which is written from the tile files on first run
+        if os.path.exists(TILE_ATLAS_PATH):
+            atlas = tk.PhotoImage(file=TILE_ATLAS_PATH)
+            width = atlas.width() // 9
+            tile_images = []
+            for n in range(9):
+                tile_image = tk.PhotoImage(width=width, height=atlas.height())
+                tile_image.tk.call(tile_image, 'copy', atlas, '-from', n * width, 0, (n + 1) * width, atlas.height())
+                tile_images.append(tile_image)
+            return tile_images
+        
+        try:
+            tile_images = [tk.PhotoImage(file=f'src/assets/images/tile_{n}.png') for n in range(9)]
+        except tk.TclError:
+            # tk builds older than 8.6 cannot read png, so pillow is only imported for them
+            from PIL import Image, ImageTk
+            return [ImageTk.PhotoImage(Image.open(f'src/assets/images/tile_{n}.png')) for n in range(9)]
+        
+        width = tile_images[0].width()
+        atlas = tk.PhotoImage(width=width * 9, height=tile_images[0].height())
+        for n, tile_image in enumerate(tile_images):
+            atlas.tk.call(atlas, 'copy', tile_image, '-to', n * width, 0)
+        os.makedirs(os.path.dirname(TILE_ATLAS_PATH), exist_ok=True)
+        atlas.write(TILE_ATLAS_PATH, format='png')
+        return tile_images
     
     def show_frame(self, page, *args, **kwargs):
         frame = page(self.container, self, *args, **kwargs)
@@ -38,10 +84,7 @@ class PuzzlePage(tk.Frame):
         self.moves = 0
         self.board = []
         
-        self.available_algorithms = [
-            algorithm('A*', A_STAR),
-            algorithm('BFS', BFS)
-        ]
+        self.available_algorithms = ALGORITHMS
         self.algorithm_index = 0
         self.algorithm = self.available_algorithms[0]
         
@@ -49,11 +92,19 @@ class PuzzlePage(tk.Frame):
         self.goal_board_state = tuple(range(9))
         self.saved_board_state = tuple(range(9))
         
-        self.tile_images = [ImageTk.PhotoImage(Image.open(f'src/assets/images/tile_{n}.png')) for n in range(9)]
+        self.tile_images = controller.load_tile_images()
+        controller.log_startup('tile images loaded')
         
-        self.is_stopped = False
         self.is_solving = False
         self.is_done = False
+        self.search_task = None
+        
+        # playback runs from after() callbacks on the main thread, one queued action per callback
+        self.playback_actions = deque()
+        self.playback_id = None
+        self.playback_delay = PLAYBACK_MOVE_DELAY
+        self.solution_cache = SolutionCache(path=CACHE_PATH)
+        self.hint_oracle = HintOracle()
         
         self.display_widgets()
     
@@ -108,75 +159,146 @@ class PuzzlePage(tk.Frame):
         self.controller.bind('<Down>', lambda event: self.transform_keys('U'))
         self.controller.bind('<Left>', lambda event: self.transform_keys('R'))
         self.controller.bind('<Right>', lambda event: self.transform_keys('L'))
+        
+        self.controller.bind('<plus>', lambda event: self.change_speed(0.5))
+        self.controller.bind('<equal>', lambda event: self.change_speed(0.5))
+        self.controller.bind('<minus>', lambda event: self.change_speed(2))
+        self.controller.bind('<space>', lambda event: self.skip_playback())
+        self.controller.bind('<h>', lambda event: self.show_hint())
     
     def initialize_board(self):
         for index in range(9):
             self.board.append(tk.Button(self.frame_board, **TILE_BUTTON_PROPERTIES))
             self.board[index].grid(row=index // 3, column=index % 3, padx=10, pady=10)
     
-    def populate_board(self, state, delay_time=0):
+    def populate_board(self, state):
         for tile_index, tile_value in enumerate(state):
-            self.board[tile_index].configure(
-                    image=self.tile_images[tile_value],
-                    text=tile_value,
-                    state='normal',
-                    command=lambda tile_index=tile_index: self.transform_click(tile_index)
-                )
-            
-            if tile_value == 0:
-                self.board[tile_index].configure(state='disabled')
+            self.board[tile_index].configure(command=lambda tile_index=tile_index: self.transform_click(tile_index))
+            self.draw_tile(tile_index, tile_value)
         
         self.current_board_state = state
-        
-        time.sleep(delay_time)
+    
+    def draw_tile(self, tile_index, tile_value):
+        self.board[tile_index].configure(
+                image=self.tile_images[tile_value],
+                text=tile_value,
+                state='disabled' if tile_value == 0 else 'normal'
+            )
     
     def solve_board(self):
         if not self.is_solving:
-            self.reset_board()
-            self.solution_thread = Thread(target=self.run_solution)
-            self.solution_thread.start()
-    
-    def run_solution(self):
-        self.is_stopped = False
-        self.is_solving = True
-        self.is_done = False
-        self.update_status('Solving...')
-        
-        print('\nFinding solution...')
-        
-        path_to_goal, nodes_expanded, max_search_depth, time_elasped = Board.solve(self.current_board_state, self.algorithm.func)
-        
-        if not self.is_stopped:
-            print(f'Done in {round(time_elasped, 4)} second(s) with {len(path_to_goal)} moves using {self.algorithm.name}')
-            print(f'Has a max search depth of {max_search_depth} and nodes expanded of {nodes_expanded}')
-            print('Actions:', *path_to_goal)
-        else:
-            print('Stopped')
-        
-        if path_to_goal:
-            print('\nMoving board...')
-            self.update_status('Moving...')
+            # the board is solved from where the player left it
+            self.stop_solution()
+            self.is_solving = True
+            self.is_done = False
+            self.update_status('Solving...')
             
-            delay_time = 0.75
-            time.sleep(delay_time)
+            print('\nFinding solution...')
             
-            for action in path_to_goal:
-                if self.is_stopped:
-                    print('Stopped')
-                    self.update_status('Playing...')
-                    break
-                else:
-                    self.transform_state(action, delay_time=0.5)
-            else:
-                print('Done board animation')
-                self.update_status('Solved!')
-                self.is_done = True
+            path_to_goal = self.hint_oracle.reusable_path(self.current_board_state)
+            if path_to_goal is not None:
+                print('Reusing the earlier solution')
+                self.finish_search(Solution(path_to_goal, 0, len(path_to_goal), 0))
+                return
+            
+            solution = self.solution_cache.get(self.current_board_state, self.algorithm.func, self.algorithm.heuristic)
+            if solution is not None:
+                print('Found cached solution', self.solution_cache)
+                self.finish_search(solution)
+                return
             
+            # the search runs in slices between tkinter events, so the window stays responsive
+            # a player who walked off an earlier solution only needs the way back onto it
+            if self.hint_oracle.known_path(self.current_board_state) is not None:
+                print('Searching back onto the earlier solution')
+                self.search_task = SearchTask(self.current_board_state, self.hint_oracle.search)
+                self.search_task.schedule(self, lambda task: self.finish_search(task.solution))
+            else:
+                self.search_task = SearchTask(self.current_board_state, self.algorithm.func, self.algorithm.heuristic)
+                self.search_task.schedule(self, self.cache_search)
+    
+    def cache_search(self, task):
+        if task.solution is not None:
+            self.solution_cache.put(task.start_node.tiles(), self.algorithm.func, self.algorithm.heuristic, task.solution)
+        self.finish_search(task.solution)
+    
+    def finish_search(self, solution):
+        self.search_task = None
+        if solution is None:
+            print('No solution found')
             self.is_solving = False
+            self.update_status('Playing...')
+            return
+        
+        path_to_goal, nodes_expanded, max_search_depth, time_elasped = solution
+        print(f'Done in {round(time_elasped, 4)} second(s) with {len(path_to_goal)} moves using {self.algorithm.name}')
+        print(f'Has a max search depth of {max_search_depth} and nodes expanded of {nodes_expanded}')
+        if solution.statistics is not None and solution.statistics.bound != 1:
+            bound = solution.statistics.bound
+            print(f'Is at most {round(bound, 4)} times the optimal length' if bound is not None else 'Has no bound on its length')
+        print('Actions:', *path_to_goal)
+        
+        is_optimal = solution.statistics is not None and solution.statistics.bound == 1
+        self.hint_oracle.remember(self.current_board_state, path_to_goal, is_optimal)
+        self.start_playback(path_to_goal)
+    
+    def start_playback(self, path_to_goal):
+        if not path_to_goal:
+            self.is_solving = False
+            self.update_status('Playing...')
+            return
         
+        print('\nMoving board...')
+        self.update_status('Moving...')
+        self.playback_actions = deque(path_to_goal)
+        self.playback_id = self.after(PLAYBACK_START_DELAY, self.play_next_action)
+    
+    def play_next_action(self):
+        if self.playback_actions:
+            self.transform_state(self.playback_actions.popleft())
+            self.playback_id = self.after(self.playback_delay, self.play_next_action)
         else:
+            print('Done board animation')
+            self.playback_id = None
+            self.update_status('Solved!')
             self.is_solving = False
-            self.update_status('Playing...')
+            self.is_done = True
+    
+    def skip_playback(self):
+        if self.playback_id is not None:
+            self.after_cancel(self.playback_id)
+            
+            # the remaining actions are applied to the state first, so the board is redrawn once
+            state = self.current_board_state
+            for action in self.playback_actions:
+                state = Board.transform(state, action)
+            self.update_moves(self.moves + len(self.playback_actions))
+            self.playback_actions.clear()
+            self.populate_board(state)
+            self.play_next_action()
+    
+    def stop_playback(self):
+        if self.playback_id is not None:
+            self.after_cancel(self.playback_id)
+            self.playback_id = None
+            self.playback_actions.clear()
+            self.is_solving = False
+            print('Stopped')
+    
+    def show_hint(self):
+        if not self.is_solving and not self.is_done:
+            hint = self.hint_oracle.hint(self.current_board_state)
+            if hint is None or hint[0] is None:
+                self.update_status('No hint yet')
+                return
+            
+            action, distance = hint
+            tile_value = self.current_board_state[Board.transform(self.current_board_state, action).index(0)]
+            self.update_status(f'Move {tile_value}, {distance} left')
+    
+    def change_speed(self, factor):
+        self.playback_delay = min(max(int(self.playback_delay * factor), PLAYBACK_MIN_DELAY), PLAYBACK_MAX_DELAY)
+        print(f'Playback delay set to {self.playback_delay} ms')
     
     def reset_board(self):
         self.stop_solution()
@@ -189,8 +311,14 @@ class PuzzlePage(tk.Frame):
         self.reset_board()
     
     def stop_solution(self):
-        if self.is_solving and not self.is_stopped:
-            self.is_stopped = True
+        if self.search_task is not None:
+            # a cancelled search drops its remaining slices instead of running them in the background
+            self.search_task.cancel()
+            self.search_task = None
+            self.is_solving = False
+            print('Stopped')
+        else:
+            self.stop_playback()
         self.is_done = False
     
     def change_algorithm(self):
@@ -202,7 +330,7 @@ class PuzzlePage(tk.Frame):
     def transform_click(self, tile_index):
         possible_actions = Board.valid_actions(self.current_board_state)
         blank_index = self.current_board_state.index(0)
-        tile_value = int(self.board[tile_index].cget('text'))
+        tile_value = self.current_board_state[tile_index]
         
         for action in possible_actions:
             if not self.is_solving and not self.is_done:
@@ -231,38 +359,21 @@ class PuzzlePage(tk.Frame):
             self.update_status('Well done!')
             self.is_done = True
     
-    def transform_state(self, action, delay_time=0):
+    def transform_state(self, action):
+        self.hint_oracle.moved(self.current_board_state, action)
         new_state = Board.transform(self.current_board_state, action)
         
         current_index = self.current_board_state.index(0)
         new_index = new_state.index(0)
         
-        first_tile = self.board[current_index]
-        second_tile = self.board[new_index]
-        
-        first_tile_properties = self.get_tile_property(first_tile)
-        second_tile_properties = self.get_tile_property(second_tile)
-        
-        self.set_tile_property(first_tile, second_tile_properties)
-        self.set_tile_property(second_tile, first_tile_properties)
+        # only the blank and the tile it swaps with change
+        self.draw_tile(current_index, new_state[current_index])
+        self.draw_tile(new_index, 0)
         
         self.current_board_state = new_state
         
         if not self.is_done:
             self.update_moves(self.moves + 1)
-        
-        time.sleep(delay_time)
-    
-    def get_tile_property(self, tile):
-        return {
-            'text': tile.cget('text'),
-            'background': tile.cget('background'),
-            'image': tile.cget('image'),
-            'state': tile.cget('state')
-        }
-    
-    def set_tile_property(self, tile, properties):
-        tile.configure(**properties)
     
     def update_moves(self, moves):
         self.moves = moves
@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import time
+import argparse
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from src.utils import Board, A_STAR_INCREMENTAL
+from src.algorithms import get_algorithm
+
+# lines solved between checkpoints, each one flushes the output to disk
+CHECKPOINT_INTERVAL = 1000
+
+def solve_chunk(func, heuristic, width, packed_states):
+    """Returns the compact solutions of a chunk of packed states, with None passed through and the error of any failed solve"""
+    solutions = []
+    for packed in packed_states:
+        if packed is None:
+            solutions.append(None)
+            continue
+        try:
+            path_to_goal, nodes_expanded, max_search_depth, time_elapsed = Board.solve(Board.unpack(packed, width), func, heuristic)
+        except Exception as error:
+            # a failed state is reported in its place instead of losing the rest of the chunk
+            solutions.append(error)
+            continue
+        solutions.append((''.join(path_to_goal), nodes_expanded, max_search_depth, time_elapsed))
+    return solutions
+
+def iterate_chunks(states, chunk_size):
+    """Generates chunks of packed states from an iterable of states, keeping None in place"""
+    states = iter(states)
+    while chunk := [None if state is None else Board.pack(state) for state in islice(states, chunk_size)]:
+        yield chunk
+
+def unpack_solutions(width, packed_states, solutions):
+    """Generates the (state, solution) pairs of a solved chunk"""
+    for packed, solution in zip(packed_states, solutions):
+        if packed is None or isinstance(solution, Exception):
+            yield None if packed is None else Board.unpack(packed, width), solution
+            continue
+        path_to_goal, *statistics = solution
+        yield Board.unpack(packed, width), (tuple(path_to_goal), *statistics)
+
+def solve_many(states, func, workers=None, chunk_size=64, ordered=True, max_pending=None, width=3, heuristic=None):
+    """Generates (state, solution) pairs of an iterable of states solved across a process pool, the solution being the error of a failed state and None for a None state"""
+    # heuristics are passed by registry name, each worker loads its own tables
+    workers = workers or os.cpu_count()
+    # at most this many chunks are in flight, so the input is only read as fast as it is solved
+    max_pending = max_pending or workers * 2
+    chunks = iterate_chunks(states, chunk_size)
+    pending = deque()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit():
+            """Submits the next chunk, returning False once the input is exhausted"""
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            pending.append((executor.submit(solve_chunk, func, heuristic, width, chunk), chunk))
+            return True
+        
+        while len(pending) < max_pending and submit():
+            pass
+        
+        while pending:
+            if ordered:
+                future, chunk = pending.popleft()
+            else:
+                done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+                future, chunk = next(entry for entry in pending if entry[0] in done)
+                pending.remove((future, chunk))
+            
+            submit()
+            yield from unpack_solutions(width, chunk, future.result())
+
+def parse_record(line, width=3):
+    """Returns the json object of an input line and its state, raising ValueError for anything unsolvable"""
+    record = json.loads(line)
+    # a line is either the bare list of tiles or an object holding it, whose other keys are passed through
+    if not isinstance(record, dict):
+        record = {'state': record}
+    state = record.get('state')
+    if not isinstance(state, list) or not all(isinstance(tile, int) for tile in state):
+        raise ValueError('state must be a list of tiles')
+    if len(state) != width * width or sorted(state) != list(range(len(state))):
+        raise ValueError(f'state must hold the tiles 0 to {width * width - 1}')
+    state = tuple(state)
+    if not Board.is_solvable(state):
+        raise ValueError('state is not solvable')
+    return record, state
+
+def load_checkpoint(path):
+    """Returns the saved progress of a job, or None when it has not started"""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def save_checkpoint(path, output, progress):
+    """Saves the progress of a job once everything written so far is on disk"""
+    output.flush()
+    os.fsync(output.fileno())
+    # the checkpoint is replaced whole, so a crash leaves either the old one or the new one
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(progress, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+def solve_lines(lines, name, workers=None, chunk_size=64, width=3, first_line=0):
+    """Generates the output record of every input line, solved in order across a process pool"""
+    registered = get_algorithm(name)
+    # every line goes through the pool in order, invalid ones as None, so records are bounded to the chunks in flight
+    records = deque()
+    
+    def iterate_states():
+        for number, line in enumerate(lines, first_line):
+            try:
+                if not line.strip():
+                    raise ValueError('empty line')
+                record, state = parse_record(line, width)
+            except ValueError as error:
+                records.append(({'line': number}, str(error)))
+                yield None
+                continue
+            records.append(({**record, 'line': number}, None))
+            yield state
+    
+    for _, solution in solve_many(
+        iterate_states(), registered.func, workers, chunk_size, width=width, heuristic=registered.heuristic
+        ):
+        record, error = records.popleft()
+        if isinstance(solution, Exception):
+            error = str(solution)
+        if error is not None:
+            yield {'line': record['line'], 'error': error}
+            continue
+        path_to_goal, nodes_expanded, max_search_depth, time_elapsed = solution
+        yield {
+            **record,
+            'path_to_goal': ''.join(path_to_goal),
+            'moves': len(path_to_goal),
+            'nodes_expanded': nodes_expanded,
+            'max_search_depth': max_search_depth,
+            'time_elapsed': time_elapsed
+        }
+
+def check_algorithm(name, width=3):
+    """Raises an error when an algorithm cannot solve states of a width"""
+    registered = get_algorithm(name)
+    # the goal is solved at once by anything that works at all, and its tables are built here before the workers load them
+    try:
+        Board.solve(Board.puzzle(width).goal, registered.func, registered.heuristic)
+    except ValueError as error:
+        raise ValueError(f'{name} cannot solve {width}x{width} boards: {error}') from error
+
+def run_job(input_file, output, name, workers=None, chunk_size=64, width=3, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL, progress=None):
+    """Solves every line of the input into the output, saving progress every checkpoint interval lines"""
+    progress = progress or {'lines': 0, 'offset': 0, 'solved': 0, 'failed': 0}
+    lines = islice(input_file, progress['lines'], None)
+    
+    def checkpoint():
+        if checkpoint_path is not None:
+            save_checkpoint(checkpoint_path, output, {**progress, 'offset': output.tell(), 'algorithm': name, 'width': width})
+    
+    for record in solve_lines(lines, name, workers, chunk_size, width, progress['lines']):
+        output.write(json.dumps(record) + '\n')
+        progress['lines'] += 1
+        progress['failed' if 'error' in record else 'solved'] += 1
+        if progress['lines'] % checkpoint_interval == 0:
+            checkpoint()
+    checkpoint()
+    return progress
+
+def measure_throughput(count=2000):
+    """Prints the throughput of solving random states with one worker and with every cpu"""
+    states = [Board.create_solvable_state() for _ in range(count)]
+    
+    for workers in sorted({1, os.cpu_count()}):
+        start_time = time.perf_counter()
+        solutions = list(solve_many(states, A_STAR_INCREMENTAL, workers=workers))
+        time_elasped = time.perf_counter() - start_time
+        print(f'Solved {len(solutions)} states in {round(time_elasped, 4)} second(s) using {workers} worker(s)')
+        print(f'Has a throughput of {round(len(solutions) / time_elasped)} states/sec')
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Solves a JSONL stream of states into a JSONL stream of solutions')
+    parser.add_argument('input', nargs='?', default='-', help='file of one state per line, stdin by default')
+    parser.add_argument('-o', '--output', default='-', help='file to write the solutions to, stdout by default')
+    parser.add_argument('--algorithm', default='incremental A*')
+    parser.add_argument('--workers', type=int, help='search processes, one per cpu by default')
+    parser.add_argument('--chunk-size', type=int, default=64, help='states sent to a worker at a time')
+    parser.add_argument('--width', type=int, default=3)
+    parser.add_argument('--checkpoint', help='file to save progress to, a job with one resumes from it')
+    parser.add_argument('--checkpoint-interval', type=int, default=CHECKPOINT_INTERVAL, help='lines solved between checkpoints')
+    parser.add_argument('--benchmark', action='store_true', help='measure the throughput on random states instead')
+    arguments = parser.parse_args(arguments)
+    
+    if arguments.benchmark:
+        measure_throughput()
+        return
+    try:
+        check_algorithm(arguments.algorithm, arguments.width)
+    except (KeyError, ValueError) as error:
+        parser.error(str(error))
+    if arguments.checkpoint is not None and (arguments.input == '-' or arguments.output == '-'):
+        parser.error('a checkpointed job needs an input and an output file to resume from')
+    
+    progress = load_checkpoint(arguments.checkpoint)
+    if progress is not None and (progress['algorithm'], progress['width']) != (arguments.algorithm, arguments.width):
+        parser.error(f'the checkpoint was saved by a job using {progress["algorithm"]} on width {progress["width"]}')
+    
+    input_file = sys.stdin if arguments.input == '-' else open(arguments.input)
+    if arguments.output == '-':
+        output = sys.stdout
+    elif progress is not None:
+        # anything written after the last checkpoint is solved again, so it is cut off first
+        output = open(arguments.output, 'r+')
+        output.seek(progress['offset'])
+        output.truncate()
+    else:
+        output = open(arguments.output, 'w')
+    
+    if progress is not None:
+        print(f'Resuming from line {progress["lines"]}', file=sys.stderr)
+    start_time = time.perf_counter()
+    try:
+        progress = run_job(
+            input_file, output, arguments.algorithm, arguments.workers, arguments.chunk_size,
+            arguments.width, arguments.checkpoint, arguments.checkpoint_interval, progress
+            )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+    
+    time_elasped = time.perf_counter() - start_time
+    print(f'Done in {round(time_elasped, 4)} second(s) with {progress["solved"]} solved and {progress["failed"]} failed', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+import time
+from collections import defaultdict
+
+from src.utils import Board, BoardNode, A_STAR, BFS, HashedClosedSet, BitmapClosedSet
+from src.algorithms import ALGORITHMS
+from src.database import DistanceDatabase, get_database
+
+# the search itself decides these, so they only change when the code does
+GATED_METRICS = ('nodes_expanded', 'peak_frontier')
+TIMED_METRICS = ('wall_time', 'peak_memory')
+# buckets faster than this are never gated on wall time
+MIN_GATED_WALL_TIME = 0.05
+
+def generate_corpus(seed=0, per_depth=3, max_depth=31):
+    """Returns a seeded corpus of states grouped by optimal solution depth"""
+    database = get_database()
+    ranks = defaultdict(list)
+    for rank, depth in enumerate(memoryview(database.distances)):
+        if depth <= max_depth:
+            ranks[depth].append(rank)
+    
+    generator = random.Random(seed)
+    return {
+        depth: [DistanceDatabase.unrank(rank) for rank in generator.sample(ranks[depth], min(per_depth, len(ranks[depth])))]
+        for depth in sorted(ranks)
+    }
+
+def save_corpus(corpus, path):
+    """Writes a corpus to a json file"""
+    with open(path, 'w') as file:
+        json.dump({str(depth): states for depth, states in corpus.items()}, file)
+
+def load_corpus(path):
+    """Returns a corpus read from a json file"""
+    with open(path) as file:
+        return {int(depth): [tuple(state) for state in states] for depth, states in json.load(file).items()}
+
+def run_bucket(states, registered, trace_memory=True, repeats=3):
+    """Returns the statistics of an algorithm over the states of one depth"""
+    wall_time = 0
+    nodes_expanded = 0
+    peak_frontier = 0
+    peak_memory = None
+    for state in states:
+        # the fastest of several solves is the least disturbed by whatever else the machine is doing
+        timings = [Board.solve(state, registered.func, registered.heuristic).statistics for _ in range(repeats)]
+        statistics = min(timings, key=lambda statistics: statistics.time_elapsed)
+        wall_time += statistics.time_elapsed
+        nodes_expanded += statistics.nodes_expanded
+        peak_frontier = max(peak_frontier, statistics.peak_frontier)
+        
+        # traced runs are slower, so memory is measured in a separate solve
+        if trace_memory:
+            statistics = Board.solve(state, registered.func, registered.heuristic, trace_memory=True).statistics
+            peak_memory = max(peak_memory or 0, statistics.peak_memory)
+    
+    return {
+        'states': len(states),
+        'wall_time': wall_time,
+        'nodes_expanded': nodes_expanded,
+        'nodes_per_second': nodes_expanded / wall_time if wall_time else None,
+        'peak_frontier': peak_frontier,
+        'peak_memory': peak_memory
+    }
+
+def run_benchmark(corpus, algorithms=ALGORITHMS, trace_memory=True, repeats=3):
+    """Returns the statistics of every algorithm per depth bucket"""
+    results = {}
+    for registered in algorithms:
+        print(f'Benchmarking {registered.name}...', file=sys.stderr)
+        results[registered.name] = {
+            str(depth): run_bucket(states, registered, trace_memory, repeats)
+            for depth, states in corpus.items()
+        }
+    return results
+
+def compare_closed_sets(states, solvers=(A_STAR, BFS), closed_sets=(HashedClosedSet, BitmapClosedSet)):
+    """Returns the wall time and peak traced memory of every solver with every closed set over the states"""
+    results = {}
+    for func in solvers:
+        for closed_set in closed_sets:
+            wall_time = 0
+            peak_memory = 0
+            for state in states:
+                start_node = BoardNode.from_state(state)
+                start_time = time.perf_counter()
+                func(start_node, closed_set=closed_set)
+                wall_time += time.perf_counter() - start_time
+                
+                tracemalloc.start()
+                func(BoardNode.from_state(state), closed_set=closed_set)
+                peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            results[f'{func.__name__} + {closed_set.__name__}'] = {'wall_time': wall_time, 'peak_memory': peak_memory}
+    return results
+
+def find_regressions(results, baseline, threshold, metrics=GATED_METRICS, min_wall_time=MIN_GATED_WALL_TIME):
+    """Returns a description of every bucket that got slower or expanded more nodes than allowed"""
+    regressions = []
+    for name, buckets in results.items():
+        for depth, statistics in buckets.items():
+            previous = baseline.get(name, {}).get(depth)
+            if previous is None:
+                continue
+            for metric in metrics:
+                if statistics[metric] is None or not previous.get(metric):
+                    continue
+                # buckets solved in a few milliseconds swing by several times from noise alone
+                if metric == 'wall_time' and max(statistics[metric], previous[metric]) < min_wall_time:
+                    continue
+                change = statistics[metric] / previous[metric] - 1
+                if change > threshold:
+                    regressions.append(f'{name} at depth {depth}: {metric} up {round(change * 100, 1)}%')
+    return regressions
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmarks every registered algorithm over a depth-stratified corpus')
+    parser.add_argument('--corpus', help='json corpus to load, or to create if missing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--per-depth', type=int, default=3)
+    parser.add_argument('--max-depth', type=int, default=31)
+    parser.add_argument('--algorithms', nargs='+', help='names of the algorithms to run, all by default')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--output', help='json file to write the results to')
+    parser.add_argument('--baseline', help='json results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative increase before failing')
+    parser.add_argument('--repeats', type=int, default=3, help='solves per state, the fastest one is timed')
+    parser.add_argument('--gate-time', action='store_true', help='also fail on wall time and peak memory regressions')
+    parser.add_argument('--closed-sets', action='store_true', help='compare the closed set implementations instead')
+    arguments = parser.parse_args(arguments)
+    
+    if arguments.corpus and os.path.exists(arguments.corpus):
+        corpus = load_corpus(arguments.corpus)
+    else:
+        corpus = generate_corpus(arguments.seed, arguments.per_depth, arguments.max_depth)
+        if arguments.corpus:
+            save_corpus(corpus, arguments.corpus)
+    
+    if arguments.closed_sets:
+        states = [state for depth in sorted(corpus) if depth >= 20 for state in corpus[depth]]
+        json.dump(compare_closed_sets(states), sys.stdout, indent=2)
+        return 0
+    
+    algorithms = [registered for registered in ALGORITHMS if not arguments.algorithms or registered.name in arguments.algorithms]
+    results = run_benchmark(corpus, algorithms, not arguments.no_memory, arguments.repeats)
+    
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            metrics = GATED_METRICS + TIMED_METRICS if arguments.gate_time else GATED_METRICS
+            regressions = find_regressions(results, json.load(file), arguments.threshold, metrics)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import os
+import shelve
+from functools import lru_cache
+from collections import OrderedDict
+
+from src.utils import Board, Solution, SearchStatistics
+
+CACHE_PATH = 'src/assets/data/solutions'
+
+# transposing the board turns every vertical move of the blank into a horizontal one
+TRANSPOSED_ACTIONS = {'U': 'L', 'L': 'U', 'D': 'R', 'R': 'D'}
+
+@lru_cache(maxsize=None)
+def transposition(width=3):
+    """Returns the index each cell moves to when the board is transposed"""
+    return tuple(index % width * width + index // width for index in range(width * width))
+
+def transpose(state):
+    """Returns the state mirrored along the main diagonal with its tiles relabeled to match"""
+    # tile n belongs on cell n, so a tile is relabeled with the cell its goal cell moves to
+    cells = transposition(Board.width(state))
+    transposed = [0] * len(state)
+    for index, tile in enumerate(state):
+        transposed[cells[index]] = cells[tile]
+    return tuple(transposed)
+
+def transpose_actions(actions):
+    """Returns the actions mirrored along the main diagonal"""
+    return tuple(TRANSPOSED_ACTIONS[action] for action in actions)
+
+class SolutionCache:
+    def __init__(self, max_size=1024, path=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.disk = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.disk = shelve.open(path)
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def canonical(state):
+        """Returns the packed canonical form of a state and whether it is the transposed one"""
+        packed = Board.pack(state)
+        transposed = Board.pack(transpose(state))
+        return (transposed, True) if transposed < packed else (packed, False)
+    
+    @staticmethod
+    def key(state, func, heuristic=None):
+        """Returns the cache key of a state solved by an algorithm"""
+        packed, is_transposed = SolutionCache.canonical(state)
+        if heuristic is not None and not isinstance(heuristic, str):
+            # heuristics built from their own parameters, like pattern database groups, name themselves
+            heuristic = getattr(heuristic, 'cache_key', None) or type(heuristic).__name__
+        return f'{func.__name__}:{heuristic}:{Board.width(state)}:{packed}', is_transposed
+    
+    def remember(self, key, entry):
+        """Stores an entry in memory, evicting the least recently used one when full"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def get(self, state, func, heuristic=None):
+        """Returns the cached solution of a state, or None"""
+        key, is_transposed = self.key(state, func, heuristic)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        elif self.disk is not None and key in self.disk:
+            entry = self.disk[key]
+            self.remember(key, entry)
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            return None
+        
+        # entries written before statistics were kept have none to restore
+        actions, nodes_expanded, max_search_depth, time_elasped, *counters = entry
+        actions = tuple(actions)
+        solution = Solution(transpose_actions(actions) if is_transposed else actions, nodes_expanded, max_search_depth, time_elasped)
+        if counters and counters[0] is not None:
+            solution.statistics = SearchStatistics()
+            vars(solution.statistics).update(counters[0])
+        return solution
+    
+    def put(self, state, func, heuristic, solution):
+        """Stores the solution of a state in canonical orientation"""
+        key, is_transposed = self.key(state, func, heuristic)
+        path_to_goal, nodes_expanded, max_search_depth, time_elasped = solution
+        actions = ''.join(transpose_actions(path_to_goal) if is_transposed else path_to_goal)
+        # the statistics carry the bound, which tells whether the cached path is optimal
+        counters = solution.statistics.as_dict() if solution.statistics is not None else None
+        entry = (actions, nodes_expanded, max_search_depth, time_elasped, counters)
+        
+        self.remember(key, entry)
+        if self.disk is not None:
+            self.disk[key] = entry
+            self.disk.sync()
+    
+    def solve(self, state, func, heuristic=None):
+        """Returns the solution of a state, searching only when no equivalent state is cached"""
+        solution = self.get(state, func, heuristic)
+        if solution is None:
+            solution = Board.solve(state, func, heuristic)
+            self.put(state, func, heuristic, solution)
+        return solution
+    
+    def close(self):
+        """Closes the disk tier"""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+    
+    def as_dict(self):
+        """Returns the counters as a dictionary"""
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+    
+    def __repr__(self):
+        return f'<SolutionCache {self.as_dict()}>'
@@ -72,3 +72,14 @@ TILE_BUTTON_PROPERTIES = {
     'disabledforeground': BLACK,
     'border': 0
 }
+
+# playback timings in milliseconds
+
+PLAYBACK_START_DELAY = 750
+PLAYBACK_MOVE_DELAY = 500
+PLAYBACK_MIN_DELAY = 50
+PLAYBACK_MAX_DELAY = 2000
+
+# generated assets
+
+TILE_ATLAS_PATH = 'src/assets/data/tiles.png'
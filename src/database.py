@@ -0,0 +1,139 @@
+import os
+import mmap
+import time
+import threading
+from math import factorial
+
+from src.utils import Board, SearchStatistics, write_atomically
+
+DATABASE_PATH = 'src/assets/data/distances.bin'
+
+# permutations of the 8 tiles are ranked by their first 6 lehmer digits, the 7th is fixed by parity
+HALF_FACTORIALS = tuple(factorial(7 - index) // 2 for index in range(6))
+TILE_PERMUTATIONS = factorial(8) // 2
+STATE_COUNT = 9 * TILE_PERMUTATIONS
+UNKNOWN = 0xFF
+
+PUZZLE = Board.puzzle(3)
+
+class DistanceDatabase:
+    def __init__(self, distances):
+        self.distances = distances
+    
+    @staticmethod
+    def rank(state):
+        """Returns the perfect hash of a solvable state"""
+        tiles = [tile for tile in state if tile]
+        index = 0
+        for i in range(6):
+            tile = tiles[i]
+            index += sum(1 for later in tiles[i + 1:] if later < tile) * HALF_FACTORIALS[i]
+        return state.index(0) * TILE_PERMUTATIONS + index
+    
+    @staticmethod
+    def unrank(index):
+        """Returns the solvable state of a perfect hash"""
+        blank_index, index = divmod(index, TILE_PERMUTATIONS)
+        digits = []
+        for half_factorial in HALF_FACTORIALS:
+            digit, index = divmod(index, half_factorial)
+            digits.append(digit)
+        digits += [sum(digits) % 2, 0]
+        
+        remaining = [*range(1, 9)]
+        tiles = [remaining.pop(digit) for digit in digits]
+        tiles.insert(blank_index, 0)
+        return tuple(tiles)
+    
+    @classmethod
+    def build(cls):
+        """Returns a database of every solvable state's distance to the goal"""
+        distances = bytearray([UNKNOWN]) * STATE_COUNT
+        distances[cls.rank(PUZZLE.goal)] = 0
+        
+        layer = [(PUZZLE.packed_goal, PUZZLE.goal.index(0))]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for packed, blank_index in layer:
+                for _, child, child_blank in PUZZLE.successors(packed, blank_index):
+                    index = cls.rank(PUZZLE.unpack(child))
+                    if distances[index] == UNKNOWN:
+                        distances[index] = depth
+                        next_layer.append((child, child_blank))
+            layer = next_layer
+        
+        return cls(distances)
+    
+    @classmethod
+    def load(cls, path=DATABASE_PATH):
+        """Returns a memory-mapped database, building and saving it first if missing"""
+        if not os.path.exists(path):
+            cls.build().save(path)
+        
+        with open(path, 'rb') as file:
+            distances = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(distances) != STATE_COUNT:
+            raise ValueError(f'{path} holds {len(distances)} entries instead of {STATE_COUNT}')
+        return cls(distances)
+    
+    def save(self, path=DATABASE_PATH):
+        """Writes the distances to a file"""
+        write_atomically(path, [self.distances])
+    
+    def distance(self, state):
+        """Returns the optimal number of moves of a solvable state"""
+        return self.distances[self.rank(state)]
+    
+    def solve(self, start_node):
+        """Returns the goal node reached by always stepping to a neighbor one move closer"""
+        node = start_node
+        distance = self.distance(node.tiles())
+        while distance:
+            node.expand()
+            for neighbor in node.nodes:
+                if self.distance(neighbor.tiles()) == distance - 1:
+                    node = neighbor
+                    break
+            else:
+                raise ValueError(f'{node.tiles()} has no neighbor one move closer, the database is corrupt')
+            distance -= 1
+        return node
+
+_database = None
+# the app warms the database up on a background thread while the main thread may already need it
+_database_lock = threading.Lock()
+
+def get_database():
+    """Returns the shared database, loading it on first use"""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = DistanceDatabase.load()
+    return _database
+
+def loaded_database():
+    """Returns the shared database if it is already loaded, or None, without ever loading it"""
+    return _database
+
+def DATABASE(start_node, observer=None, statistics=None):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    # the database only ranks solvable 8-puzzle states
+    if start_node.puzzle.width != 3 or not Board.is_solvable(start_node.tiles()):
+        statistics.record(0, 0, 0)
+        return None
+    final_node = get_database().solve(start_node)
+    # the walk keeps no frontier, so there is nothing for an observer to sample
+    statistics.record(0, 0, 0)
+    return final_node, final_node.depth, final_node.depth
+
+if __name__ == '__main__':
+    print('Building database...')
+    start_time = time.time()
+    database = DistanceDatabase.build()
+    database.save()
+    print(f'Done in {round(time.time() - start_time, 4)} second(s)')
+    print(f'Saved {STATE_COUNT} states to {DATABASE_PATH} with a max distance of {max(database.distances)}')
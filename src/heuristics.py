@@ -0,0 +1,154 @@
+import threading
+from collections import deque
+
+from src.utils import Board
+from src.patterns import PatternDatabase
+
+class LinearConflictHeuristic:
+    needs_tiles = True
+    
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        self.distances = puzzle.distances
+        width = puzzle.width
+        goal_indices = [puzzle.goal.index(tile) for tile in range(puzzle.size)]
+        
+        # rows come first, then columns; each line knows its cells and each tile's goal line and offset
+        self.lines = []
+        self.line_goals = []
+        for row in range(width):
+            self.lines.append(tuple(range(row * width, row * width + width)))
+            self.line_goals.append([(index // width, index % width) for index in goal_indices])
+        for column in range(width):
+            self.lines.append(tuple(range(column, puzzle.size, width)))
+            self.line_goals.append([(index % width, index // width) for index in goal_indices])
+        
+        # conflict counts are looked up by line contents, filled the first time each line is seen
+        self.conflict_tables = [{} for _ in self.lines]
+    
+    @staticmethod
+    def longest_increasing(sequence):
+        """Returns the length of the longest increasing subsequence"""
+        lengths = []
+        for i, item in enumerate(sequence):
+            lengths.append(1 + max((lengths[j] for j in range(i) if sequence[j] < item), default=0))
+        return max(lengths, default=0)
+    
+    def line_conflicts(self, line_index, contents):
+        """Returns the extra moves needed to resolve the conflicts of a line"""
+        table = self.conflict_tables[line_index]
+        conflicts = table.get(contents)
+        if conflicts is None:
+            goals = self.line_goals[line_index]
+            line = line_index % self.puzzle.width
+            offsets = [goals[tile][1] for tile in contents if tile and goals[tile][0] == line]
+            conflicts = table[contents] = 2 * (len(offsets) - self.longest_increasing(offsets))
+        return conflicts
+    
+    def evaluate(self, tiles):
+        """Returns the manhattan distance sum plus linear conflicts of a state"""
+        manhattan = sum(self.distances[tile][index] for index, tile in enumerate(tiles))
+        return manhattan + sum(
+            self.line_conflicts(line_index, tuple(tiles[index] for index in cells))
+            for line_index, cells in enumerate(self.lines)
+            )
+    
+    def update(self, h, tiles, tile, old_index, new_index):
+        """Returns the heuristic after a tile moves, given the heuristic before it"""
+        width = self.puzzle.width
+        distances = self.distances[tile]
+        h += distances[new_index] - distances[old_index]
+        
+        # a vertical move changes the two rows it crosses, a horizontal move the two columns
+        if old_index // width != new_index // width:
+            line_indices = (old_index // width, new_index // width)
+        else:
+            line_indices = (width + old_index % width, width + new_index % width)
+        
+        for line_index in line_indices:
+            cells = self.lines[line_index]
+            after = tuple(tiles[index] for index in cells)
+            before = tuple(tile if index == old_index else 0 if index == new_index else tiles[index] for index in cells)
+            h += self.line_conflicts(line_index, after) - self.line_conflicts(line_index, before)
+        return h
+
+class WalkingDistanceHeuristic:
+    needs_tiles = True
+    
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        width = puzzle.width
+        goal_indices = [puzzle.goal.index(tile) for tile in range(puzzle.size)]
+        self.goal_rows = [index // width for index in goal_indices]
+        self.goal_columns = [index % width for index in goal_indices]
+        self.table = self.build_table(puzzle)
+    
+    @staticmethod
+    def build_table(puzzle):
+        """Returns the vertical moves needed from every (row counts, blank row) configuration"""
+        width = puzzle.width
+        blank_row = puzzle.goal.index(0) // width
+        
+        # counts[row * width + goal_row] is how many tiles of goal_row sit in row
+        counts = [0] * (width * width)
+        for index, tile in enumerate(puzzle.goal):
+            if tile:
+                counts[index // width * width + index // width] += 1
+        
+        start = (tuple(counts), blank_row)
+        table = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            configuration = frontier.popleft()
+            counts, blank_row = configuration
+            for next_row in (blank_row - 1, blank_row + 1):
+                if not 0 <= next_row < width:
+                    continue
+                for goal_row in range(width):
+                    if counts[next_row * width + goal_row]:
+                        moved = [*counts]
+                        moved[next_row * width + goal_row] -= 1
+                        moved[blank_row * width + goal_row] += 1
+                        next_configuration = (tuple(moved), next_row)
+                        if next_configuration not in table:
+                            table[next_configuration] = table[configuration] + 1
+                            frontier.append(next_configuration)
+        return table
+    
+    def evaluate(self, tiles):
+        """Returns the walking distance of a state"""
+        width = self.puzzle.width
+        row_counts = [0] * (width * width)
+        column_counts = [0] * (width * width)
+        for index, tile in enumerate(tiles):
+            if tile:
+                row_counts[index // width * width + self.goal_rows[tile]] += 1
+                column_counts[index % width * width + self.goal_columns[tile]] += 1
+        
+        # columns reuse the row table, which holds because the goal blank sits on the diagonal
+        blank_index = tiles.index(0)
+        return (self.table[tuple(row_counts), blank_index // width]
+            + self.table[tuple(column_counts), blank_index % width])
+    
+    def update(self, h, tiles, tile, old_index, new_index):
+        """Returns the heuristic after a tile moves, given the heuristic before it"""
+        return self.evaluate(tiles)
+
+HEURISTICS = {
+    'manhattan': lambda puzzle: puzzle.manhattan,
+    'linear conflict': LinearConflictHeuristic,
+    'walking distance': WalkingDistanceHeuristic,
+    'pattern database': lambda puzzle: PatternDatabase.load(puzzle.width)
+}
+
+_heuristics = {}
+# tables are built once even when a warm-up thread and a solve ask for them together
+_heuristics_lock = threading.Lock()
+
+def get_heuristic(name, width=3):
+    """Returns the shared heuristic of a name and board width"""
+    if (name, width) not in _heuristics:
+        with _heuristics_lock:
+            if (name, width) not in _heuristics:
+                _heuristics[name, width] = HEURISTICS[name](Board.puzzle(width))
+    return _heuristics[name, width]
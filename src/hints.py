@@ -0,0 +1,110 @@
+import time
+
+from src.utils import Board, OPPOSITE_ACTIONS, best_first_search, resumable
+from src.database import get_database, loaded_database
+
+class HintOracle:
+    def __init__(self, width=3):
+        self.puzzle = Board.puzzle(width)
+        # the next action towards the goal of every packed state seen on a solution or walked off one
+        self.next_actions = {}
+        # the exact remaining moves of every state on an optimal solution, the rest may take longer
+        self.distances = {self.puzzle.packed_goal: 0}
+        self.search = resumable(self.resolve)
+    
+    @property
+    def database(self):
+        """Returns the distance database once it is loaded, which only covers the 8-puzzle"""
+        # hints are asked for on the ui thread, which must never wait on the warm-up thread building the table
+        return loaded_database() if self.puzzle.width == 3 else None
+    
+    def remember(self, state, path_to_goal, is_optimal=True):
+        """Stores the next action of every state along a solution, and its remaining moves if the solution is optimal"""
+        for index, action in enumerate(path_to_goal):
+            packed = self.puzzle.pack(state)
+            if is_optimal:
+                self.next_actions[packed] = action
+                self.distances[packed] = len(path_to_goal) - index
+            elif packed not in self.distances:
+                self.next_actions[packed] = action
+            state = Board.transform(state, action)
+    
+    def moved(self, state, action):
+        """Records a player's move, so a state walked off a known solution leads back onto it"""
+        packed = self.puzzle.pack(state)
+        next_state = Board.transform(state, action)
+        next_packed = self.puzzle.pack(next_state)
+        if (packed in self.next_actions or state == self.puzzle.goal) and next_packed not in self.next_actions:
+            self.next_actions[next_packed] = OPPOSITE_ACTIONS[action]
+    
+    def known_path(self, state):
+        """Returns the actions reaching the goal through remembered states and whether they are optimal, or None"""
+        actions = []
+        is_exact = self.puzzle.pack(state) in self.distances
+        while state != self.puzzle.goal:
+            action = self.next_actions.get(self.puzzle.pack(state))
+            # a remembered path never revisits a state, so a longer one has looped
+            if action is None or len(actions) > len(self.next_actions):
+                return None
+            actions.append(action)
+            state = Board.transform(state, action)
+        return tuple(actions), is_exact
+    
+    def hint(self, state):
+        """Returns the next action and remaining moves of a state, or None when it is unknown"""
+        database = self.database
+        if database is not None:
+            # the database knows every distance, so one neighbor is always a move closer
+            distance = database.distance(state)
+            if distance == 0:
+                return None, 0
+            for action, child, _ in self.puzzle.successors(self.puzzle.pack(state), state.index(0)):
+                if database.distance(self.puzzle.unpack(child)) == distance - 1:
+                    return action, distance
+        
+        known = self.known_path(state)
+        if known is None:
+            return None
+        actions, _ = known
+        return (actions[0] if actions else None), len(actions)
+    
+    def reusable_path(self, state):
+        """Returns a remembered path from a state that is known to be optimal, or None"""
+        known = self.known_path(state)
+        if known is None:
+            return None
+        actions, is_exact = known
+        database = self.database
+        if database is not None:
+            # walking back onto the solution can still be optimal, which the database can confirm
+            is_exact = len(actions) == database.distance(state)
+        return actions if is_exact else None
+    
+    def resolve(self, start_node, observer=None, statistics=None):
+        """Returns the goal node, searching only until the cheapest way onto a known optimal solution is found"""
+        distances = self.distances
+        
+        def priority(node):
+            # a state on a known solution costs exactly its remaining moves, which is never less than its heuristic
+            distance = distances.get(node.state)
+            return node.f if distance is None else node.depth + distance
+        
+        final_node, nodes_expanded, max_search_depth = yield from best_first_search(
+            start_node, observer, statistics, priority, is_final=lambda node: node.state in distances
+            )
+        if final_node is None:
+            return None
+        final_node = final_node.follow(self.known_path(final_node.tiles())[0])
+        return final_node, nodes_expanded, max(max_search_depth, final_node.depth)
+
+if __name__ == '__main__':
+    get_database()
+    oracle = HintOracle()
+    states = [Board.create_solvable_state() for _ in range(1000)]
+    oracle.hint(states[0])
+    
+    start_time = time.perf_counter()
+    for state in states:
+        oracle.hint(state)
+    time_elasped = time.perf_counter() - start_time
+    print(f'Gave {len(states)} hints in {round(time_elasped, 4)} second(s), {round(time_elasped / len(states) * 1000, 4)} ms each')
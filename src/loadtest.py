@@ -0,0 +1,95 @@
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from src.utils import Board
+
+async def post(host, port, path, payload):
+    """Returns the status and json body of a POST request"""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode()
+    writer.write(
+        f'POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body
+        )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+async def get(host, port, path):
+    """Returns the json body of a GET request"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b'\r\n\r\n')[2])
+
+def percentile(latencies, fraction):
+    """Returns the latency below which a fraction of the sorted latencies fall"""
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] if latencies else None
+
+async def run_load(host, port, rate, requests, states, algorithm, budget):
+    """Returns the latency percentiles and status counts of requests sent at a fixed rate"""
+    latencies = []
+    statuses = {}
+    
+    async def send(state):
+        start_time = time.perf_counter()
+        try:
+            status, _ = await post(host, port, '/solve', {'state': state, 'algorithm': algorithm, 'budget': budget})
+        except OSError:
+            status = 'connection error'
+        latencies.append(time.perf_counter() - start_time)
+        statuses[status] = statuses.get(status, 0) + 1
+    
+    # requests go out on schedule whether or not earlier ones have returned, so a slow server shows up as latency
+    start_time = time.perf_counter()
+    tasks = []
+    for index in range(requests):
+        await asyncio.sleep(max(0, start_time + index / rate - time.perf_counter()))
+        tasks.append(asyncio.create_task(send(states[index % len(states)])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start_time
+    
+    latencies.sort()
+    return {
+        'requests': requests,
+        'rate': rate,
+        'elapsed': elapsed,
+        'throughput': requests / elapsed,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'server': await get(host, port, '/metrics')
+    }
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Measures the latency of a running solve service at a given request rate')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--rate', type=float, default=20, help='requests per second')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--distinct', type=int, default=50, help='distinct states to cycle through, fewer means more coalescing')
+    parser.add_argument('--algorithm', default='A*')
+    parser.add_argument('--budget', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args(arguments)
+    
+    random.seed(arguments.seed)
+    states = [list(Board.create_solvable_state()) for _ in range(arguments.distinct)]
+    results = asyncio.run(run_load(
+        arguments.host, arguments.port, arguments.rate, arguments.requests,
+        states, arguments.algorithm, arguments.budget
+        ))
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
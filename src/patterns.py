@@ -0,0 +1,190 @@
+import os
+import mmap
+import time
+
+from src.utils import Board, IDA_STAR, write_atomically
+
+PATTERNS_DIRECTORY = 'src/assets/data'
+
+# disjoint tile groups whose distances can be added without overestimating
+DEFAULT_GROUPS = {
+    3: ((1, 2, 3, 4), (5, 6, 7, 8)),
+    4: ((1, 2, 3, 6, 7), (4, 5, 8, 9, 12), (10, 11, 13, 14, 15))
+}
+UNKNOWN = 0xFF
+
+class PatternDatabase:
+    needs_tiles = True
+    
+    def __init__(self, width, groups, tables):
+        self.width = width
+        self.groups = groups
+        self.tables = tables
+        
+        # a group's index is the base-n number whose i-th digit is the index of its i-th tile
+        size = width * width
+        self.group_of = [None] * size
+        self.weights = [0] * size
+        for group_index, group in enumerate(groups):
+            for position, tile in enumerate(group):
+                self.group_of[tile] = group_index
+                self.weights[tile] = size ** position
+        
+        # the goal is its own transpose, so a transposed board takes as many moves
+        # and the larger of the direct and the mirrored lookup is still admissible
+        self.cells = [index % width * width + index // width for index in range(size)]
+    
+    @staticmethod
+    def path(width, groups):
+        """Returns the file path of a width and its tile groups"""
+        name = '_'.join('-'.join(map(str, group)) for group in groups)
+        return os.path.join(PATTERNS_DIRECTORY, f'patterns_{width}x{width}_{name}.bin')
+    
+    @staticmethod
+    def build_table(width, group):
+        """Returns the fewest moves of a group's tiles needed to bring them home from every placement"""
+        puzzle = Board.puzzle(width)
+        size = puzzle.size
+        weights = [size ** position for position in range(len(group))]
+        table = bytearray([UNKNOWN]) * size ** len(group)
+        visited = bytearray(size ** len(group) * size)
+        
+        # moving the blank onto a group tile costs 1, moving it anywhere else costs 0
+        layer = [sum(puzzle.goal.index(tile) * weight for tile, weight in zip(group, weights)) * size + puzzle.goal.index(0)]
+        depth = 0
+        while layer:
+            next_layer = []
+            while layer:
+                key = layer.pop()
+                if visited[key]:
+                    continue
+                visited[key] = 1
+                index, blank_index = divmod(key, size)
+                if table[index] == UNKNOWN:
+                    table[index] = depth
+                
+                indices = [index // weight % size for weight in weights]
+                for _, new_index, _, _ in puzzle.moves[blank_index]:
+                    if new_index in indices:
+                        moved_index = index + (blank_index - new_index) * weights[indices.index(new_index)]
+                        next_layer.append(moved_index * size + new_index)
+                    elif not visited[index * size + new_index]:
+                        layer.append(index * size + new_index)
+            layer = next_layer
+            depth += 1
+        
+        return table
+    
+    @classmethod
+    def build(cls, width=4, groups=None):
+        """Returns a pattern database of a width built from scratch"""
+        groups = groups or DEFAULT_GROUPS[width]
+        return cls(width, groups, [cls.build_table(width, group) for group in groups])
+    
+    @classmethod
+    def load(cls, width=4, groups=None):
+        """Returns a memory-mapped pattern database, building and saving it first if missing"""
+        if groups is None and width not in DEFAULT_GROUPS:
+            raise ValueError(f'no default pattern database groups for {width}x{width} boards')
+        groups = groups or DEFAULT_GROUPS[width]
+        path = cls.path(width, groups)
+        if not os.path.exists(path):
+            cls.build(width, groups).save()
+        
+        with open(path, 'rb') as file:
+            data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        
+        tables = []
+        offset = 0
+        for group in groups:
+            table_size = (width * width) ** len(group)
+            tables.append(data[offset:offset + table_size])
+            offset += table_size
+        if offset != len(data):
+            raise ValueError(f'{path} holds {len(data)} entries instead of {offset}')
+        return cls(width, groups, tables)
+    
+    def save(self):
+        """Writes the tables to a file"""
+        path = self.path(self.width, self.groups)
+        write_atomically(path, self.tables)
+    
+    @property
+    def cache_key(self):
+        """Returns a name telling databases of different widths and groups apart"""
+        return os.path.splitext(os.path.basename(self.path(self.width, self.groups)))[0]
+    
+    def group_index(self, tiles, group):
+        """Returns the table index of a group in a state"""
+        return sum(tiles.index(tile) * self.weights[tile] for tile in group)
+    
+    def mirror(self, tiles):
+        """Returns the transposed state with its tiles relabeled to match"""
+        mirrored = [0] * len(tiles)
+        for index, tile in enumerate(tiles):
+            mirrored[self.cells[index]] = self.cells[tile]
+        return mirrored
+    
+    def evaluate(self, tiles):
+        """Returns the summed group distances of a state, or of its mirror if larger"""
+        mirrored = self.mirror(tiles)
+        return max(
+            sum(table[self.group_index(tiles, group)] for group, table in zip(self.groups, self.tables)),
+            sum(table[self.group_index(mirrored, group)] for group, table in zip(self.groups, self.tables))
+            )
+    
+    def indices(self, tiles):
+        """Returns the table index of every group, then of every group in the mirrored state, then both sums"""
+        mirrored = self.mirror(tiles)
+        indices = [self.group_index(tiles, group) for group in self.groups]
+        indices += [self.group_index(mirrored, group) for group in self.groups]
+        count = len(self.groups)
+        indices.append(sum(table[index] for table, index in zip(self.tables, indices[:count])))
+        indices.append(sum(table[index] for table, index in zip(self.tables, indices[count:])))
+        return indices
+    
+    def moved(self, indices, tile, old_index, new_index):
+        """Returns the heuristic after a tile moves, and a copy of the indices shifted to match"""
+        indices = indices[:]
+        cells = self.cells
+        group_index = self.group_of[tile]
+        if group_index is not None:
+            table = self.tables[group_index]
+            index = indices[group_index]
+            moved_index = indices[group_index] = index + (new_index - old_index) * self.weights[tile]
+            indices[-2] += table[moved_index] - table[index]
+        
+        # in the mirrored state the tile is relabeled and moves between the transposed cells
+        mirrored_tile = cells[tile]
+        group_index = self.group_of[mirrored_tile]
+        if group_index is not None:
+            table = self.tables[group_index]
+            position = len(self.groups) + group_index
+            index = indices[position]
+            moved_index = indices[position] = index + (cells[new_index] - cells[old_index]) * self.weights[mirrored_tile]
+            indices[-1] += table[moved_index] - table[index]
+        
+        h = indices[-2]
+        return (h if h > indices[-1] else indices[-1]), indices
+    
+    def update(self, h, tiles, tile, old_index, new_index):
+        """Returns the heuristic after a tile moves, recomputed since the maximum of two sums cannot be shifted"""
+        return self.evaluate(tiles)
+
+if __name__ == '__main__':
+    width = 4
+    print('Building pattern database...')
+    start_time = time.time()
+    patterns = PatternDatabase.load(width)
+    print(f'Done in {round(time.time() - start_time, 4)} second(s)')
+    
+    start_state = Board.create_solvable_state(width)
+    print('\nStart state:')
+    print(Board.draw(start_state))
+    
+    print('\nFinding solution...')
+    path_to_goal, nodes_expanded, max_search_depth, time_elasped = Board.solve(start_state, IDA_STAR, patterns)
+    
+    print(f'Done in {round(time_elasped, 4)} second(s) with {len(path_to_goal)} moves using IDA*')
+    print(f'Has a max search depth of {max_search_depth} and nodes expanded of {nodes_expanded}')
+    print('Actions:', *path_to_goal)
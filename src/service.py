@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+from itertools import count
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils import Board, SearchTask
+from src.algorithms import get_algorithm, warm_up
+
+# the longest a search may run in a worker, whatever the budget of the requests waiting on it
+MAX_BUDGET = 30
+DEFAULT_BUDGET = 10
+MAX_BODY_SIZE = 1 << 16
+# how often a worker asks whether everyone waiting on its search has given up
+CANCEL_CHECK_INTERVAL = 0.05
+
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error', 504: 'Gateway Timeout'}
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# the ids of searches nobody waits on any more, shared with the workers through a manager process
+cancelled_searches = None
+
+def start_worker(cancelled):
+    """Keeps the shared cancelled searches of a worker and loads its solver tables"""
+    global cancelled_searches
+    cancelled_searches = cancelled
+    warm_up()
+
+def solve_within(name, state, budget, search_id=None):
+    """Returns the solution of a state as a dictionary, or None once the budget runs out or the search is cancelled"""
+    registered = get_algorithm(name)
+    task = SearchTask(state, registered.func, registered.heuristic)
+    start_time = time.perf_counter()
+    deadline = start_time + budget
+    next_check = start_time + CANCEL_CHECK_INTERVAL
+    while not task.step():
+        now = time.perf_counter()
+        if now > deadline:
+            task.cancel()
+            return None
+        # the manager is only asked every interval, so short searches never pay for the round trip
+        if search_id is not None and cancelled_searches is not None and now > next_check:
+            next_check = now + CANCEL_CHECK_INTERVAL
+            if search_id in cancelled_searches:
+                task.cancel()
+                return None
+    if task.solution is None:
+        raise ValueError(f'{name} cannot solve {state}')
+    
+    path_to_goal, nodes_expanded, max_search_depth, time_elasped = task.solution
+    return {
+        'path_to_goal': ''.join(path_to_goal),
+        'moves': len(path_to_goal),
+        'nodes_expanded': nodes_expanded,
+        'max_search_depth': max_search_depth,
+        'time_elapsed': time_elasped
+    }
+
+def parse_state(state):
+    """Returns a solvable tuple state, raising RequestError for anything else"""
+    if not isinstance(state, list) or not all(isinstance(tile, int) for tile in state):
+        raise RequestError(400, 'state must be a list of tiles')
+    width = Board.width(state)
+    if width < 2 or width * width != len(state) or sorted(state) != list(range(len(state))):
+        raise RequestError(400, 'state must hold the tiles 0 to n - 1 of a square board')
+    state = tuple(state)
+    if not Board.is_solvable(state):
+        raise RequestError(400, 'state is not solvable')
+    return state
+
+class SharedSearch:
+    def __init__(self, search_id, future):
+        self.search_id = search_id
+        self.future = future
+        self.waiters = 0
+        self.is_cancelled = False
+
+class SolveService:
+    def __init__(self, workers=None, max_budget=MAX_BUDGET):
+        context = multiprocessing.get_context('spawn')
+        self.manager = context.Manager()
+        self.cancelled_searches = self.manager.dict()
+        self.search_ids = count()
+        # spawned workers do not inherit the server's sockets, which forked ones would hold open
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=context,
+            initializer=start_worker,
+            initargs=(self.cancelled_searches,)
+            )
+        self.max_budget = max_budget
+        # concurrent requests for the same (algorithm, state) share the future of one search
+        self.searches = {}
+        
+        self.start_time = time.perf_counter()
+        self.latencies = deque(maxlen=10000)
+        self.requests = 0
+        self.completed = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+    
+    async def solve(self, name, state, budget):
+        """Returns the solution of a state, joining a running search of the same state if there is one"""
+        key = (name, state)
+        search = self.searches.get(key)
+        if search is None:
+            loop = asyncio.get_running_loop()
+            search_id = next(self.search_ids)
+            future = loop.run_in_executor(self.executor, solve_within, name, state, self.max_budget, search_id)
+            search = self.searches[key] = SharedSearch(search_id, future)
+            future.add_done_callback(lambda _: self.forget(key, search))
+        else:
+            self.coalesced += 1
+        
+        # shielded, so a request that runs out of budget leaves the search to the requests still waiting
+        search.waiters += 1
+        try:
+            solution = await asyncio.wait_for(asyncio.shield(search.future), budget)
+        except asyncio.TimeoutError:
+            solution = None
+        finally:
+            search.waiters -= 1
+            if not search.waiters and not search.future.done():
+                # nobody is left to answer, so the worker stops instead of searching on to the max budget
+                search.is_cancelled = True
+                self.cancelled_searches[search.search_id] = True
+                self.forget(key, search)
+        if solution is None:
+            raise RequestError(504, f'no solution within {budget} second(s)')
+        return solution
+    
+    def forget(self, key, search):
+        """Drops a search, so later requests for its state start a new one"""
+        if self.searches.get(key) is search:
+            del self.searches[key]
+        if search.is_cancelled and search.future.done():
+            self.cancelled_searches.pop(search.search_id, None)
+    
+    async def handle_solve(self, body):
+        """Returns the response of a solve request"""
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            raise RequestError(400, 'body must be json')
+        if not isinstance(request, dict):
+            raise RequestError(400, 'body must be a json object')
+        
+        state = parse_state(request.get('state'))
+        name = request.get('algorithm', 'A*')
+        try:
+            get_algorithm(name)
+        except KeyError as error:
+            raise RequestError(400, str(error))
+        
+        budget = request.get('budget', DEFAULT_BUDGET)
+        # bool is a subclass of int, so true would otherwise pass as one second
+        if isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget <= 0:
+            raise RequestError(400, 'budget must be a positive number of seconds')
+        return await self.solve(name, state, min(budget, self.max_budget))
+    
+    def metrics(self):
+        """Returns the request counters, latency percentiles and throughput"""
+        latencies = sorted(self.latencies)
+        def percentile(fraction):
+            return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] if latencies else None
+        uptime = time.perf_counter() - self.start_time
+        return {
+            'uptime': uptime,
+            'requests': self.requests,
+            'completed': self.completed,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'in_flight': len(self.searches),
+            'throughput': self.completed / uptime if uptime else None,
+            'latency_p50': percentile(0.5),
+            'latency_p99': percentile(0.99)
+        }
+    
+    async def route(self, method, path, body):
+        """Returns the status and json payload of a request"""
+        if method == 'POST' and path == '/solve':
+            return 200, await self.handle_solve(body)
+        if method == 'GET' and path == '/metrics':
+            return 200, self.metrics()
+        raise RequestError(404, f'no route for {method} {path}')
+    
+    async def handle_connection(self, reader, writer):
+        """Answers a single HTTP request on a connection, then closes it"""
+        start_time = time.perf_counter()
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) != 3:
+                raise RequestError(400, 'malformed request line')
+            
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY_SIZE:
+                raise RequestError(413, 'body too large')
+            body = await reader.readexactly(length) if length else b''
+            
+            method, path, _ = request_line
+            self.requests += 1
+            status, payload = await self.route(method, path, body)
+            if path == '/solve':
+                self.completed += 1
+                self.latencies.append(time.perf_counter() - start_time)
+        except RequestError as error:
+            status, payload = error.status, {'error': str(error)}
+            if error.status == 504:
+                self.timeouts += 1
+            else:
+                self.errors += 1
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            status, payload = 400, {'error': str(error)}
+            self.errors += 1
+        except Exception as error:
+            status, payload = 500, {'error': repr(error)}
+            self.errors += 1
+        
+        content = json.dumps(payload).encode()
+        writer.write(
+            f'HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(content)}\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1') + content
+            )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    async def serve(self, host='127.0.0.1', port=8080):
+        """Serves requests until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f'Serving on http://{host}:{port}')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            self.manager.shutdown()
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Serves Board.solve over HTTP on localhost')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, help='search processes, one per cpu by default')
+    parser.add_argument('--max-budget', type=float, default=MAX_BUDGET, help='longest a search may run, in seconds')
+    arguments = parser.parse_args(arguments)
+    
+    service = SolveService(arguments.workers, arguments.max_budget)
+    try:
+        asyncio.run(service.serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,48 @@
+import os
 import time
 import random
+import tracemalloc
 import heapq
-from collections import namedtuple, deque
+from math import isqrt, factorial
+from functools import lru_cache, wraps
+from itertools import count, permutations
+from array import array
+from collections import namedtuple
 
-algorithm = namedtuple('Algorithm', ['name', 'func'])
+algorithm = namedtuple('Algorithm', ['name', 'func', 'heuristic'], defaults=[None])
+
+OPPOSITE_ACTIONS = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L', None: None}
+# boards with more permutations than this are too big for a dense visited bytearray
+MAX_BITMAP_STATES = 10 ** 7
+# stored nodes keep their action as an index into this string, the root's is None
+ACTION_CODES = 'UDLR'
+
+def write_atomically(path, chunks):
+    """Writes chunks of bytes to a file that only appears once complete"""
+    # a process loading the file, possibly while another builds it, never maps a partial one
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(temporary_path, path)
 
 class Board:
     @staticmethod
-    def translate_to_2D(index):
+    def width(state):
+        """Returns the width of a square state"""
+        return isqrt(len(state))
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def puzzle(width=3):
+        """Returns the shared lookup tables of a board width"""
+        return Puzzle(width)
+    
+    @staticmethod
+    def translate_to_2D(index, width=3):
         """Returns a tuple of 2D coordinate equivalent"""
-        return index // 3, index % 3
+        return index // width, index % width
     
     @staticmethod
     def manhattan_distance(x1, y1, x2, y2):
@@ -19,74 +52,242 @@ class Board:
     @staticmethod
     def valid_actions(state):
         """Generates valid actions of a given state"""
+        width = Board.width(state)
         blank_index = state.index(0)
-        if blank_index > 2:
+        if blank_index >= width:
             yield 'U'
-        if blank_index < 6:
+        if blank_index < len(state) - width:
             yield 'D'
-        if blank_index % 3 > 0:
+        if blank_index % width > 0:
             yield 'L'
-        if blank_index % 3 < 2:
+        if blank_index % width < width - 1:
             yield 'R'
     
     @staticmethod
     def transform(state, action):
         """Returns a new instance of a state when an action is applied"""
+        width = Board.width(state)
         state = [*state]
         blank_index = state.index(0)
         match action:
             case 'U':
-                state[blank_index], state[blank_index - 3] = state[blank_index - 3], state[blank_index]
+                state[blank_index], state[blank_index - width] = state[blank_index - width], state[blank_index]
             case 'D':
-                state[blank_index], state[blank_index + 3] = state[blank_index + 3], state[blank_index]
+                state[blank_index], state[blank_index + width] = state[blank_index + width], state[blank_index]
             case 'L':
                 state[blank_index], state[blank_index - 1] = state[blank_index - 1], state[blank_index]
             case 'R':
                 state[blank_index], state[blank_index + 1] = state[blank_index + 1], state[blank_index]
         return tuple(state)
     
+    @staticmethod
+    def pack(state):
+        """Returns the packed integer equivalent of a state"""
+        return Board.puzzle(Board.width(state)).pack(state)
+    
+    @staticmethod
+    def unpack(packed, width=3):
+        """Returns the tuple equivalent of a packed state"""
+        return Board.puzzle(width).unpack(packed)
+    
+    @staticmethod
+    def successors(packed, blank_index, width=3):
+        """Generates the (action, packed state, blank index) children of a packed state"""
+        return Board.puzzle(width).successors(packed, blank_index)
+    
     @staticmethod
     def inversions(state):
         """Returns the inversion sum of a state"""
         inversion_sum = 0
-        for i in range(9):
-            for j in range(i + 1, 9):
+        for i in range(len(state)):
+            for j in range(i + 1, len(state)):
                 if state[i] != 0 and state[j] != 0 and state[i] > state[j]:
                     inversion_sum += 1
         return inversion_sum
     
     @staticmethod
-    def is_solvable(state):
-        """Checks if a state is solvable or not"""
-        return Board.inversions(state) % 2 == 0
+    def is_solvable(state, goal=None):
+        """Checks if a state is solvable or not, towards the canonical goal by default"""
+        if goal is not None:
+            state = GoalMapping(goal).to_canonical(state)
+        width = Board.width(state)
+        # on even widths every vertical move also flips the inversion parity
+        blank_row = state.index(0) // width if width % 2 == 0 else 0
+        return (Board.inversions(state) + blank_row) % 2 == 0
     
     @staticmethod
-    def create_solvable_state():
+    def create_solvable_state(width=3):
         """Returns a random solvable state"""
-        state = [*range(9)]
+        state = [*range(width * width)]
         while True:
             random.shuffle(state)
             if Board.is_solvable(state):
                 return tuple(state)
     
     @staticmethod
-    def solve(state, func):
-        """Returns the solution of a state given a search algorithm"""
-        board_node = BoardNode(state)
-        
-        start_time = time.time()
-        final_node, nodes_expanded, max_search_depth = func(board_node)
-        final_time = time.time()
+    def resolve_heuristic(heuristic, width=3):
+        """Returns the heuristic object of a registry name, or the heuristic itself"""
+        if isinstance(heuristic, str):
+            # the registry builds on this module, so it is only imported when a name is given
+            from src.heuristics import get_heuristic
+            return get_heuristic(heuristic, width)
+        return heuristic
+    
+    @staticmethod
+    def solve(state, func, heuristic=None, observer=None, trace_memory=False, goal=None, **options):
+        """Returns the solution of a state given a search algorithm and its options, towards the canonical goal by default"""
+        # other goals are searched as the canonical one, so every table and cache built for it still applies
+        mapping = None
+        if goal is not None and tuple(goal) != Board.puzzle(Board.width(state)).goal:
+            mapping = GoalMapping(goal)
         
-        path_to_goal = final_node.actions()
-        time_elasped = final_time - start_time
+        task = SearchTask(mapping.to_canonical(state) if mapping else state, func, heuristic, observer, **options)
+        solution = task.run(trace_memory)
+        if solution is None:
+            raise ValueError(f'{state} has no solution')
         
-        return path_to_goal, nodes_expanded, max_search_depth, time_elasped
+        if mapping is not None:
+            statistics = solution.statistics
+            solution = solution._replace(path_to_goal=mapping.to_goal_actions(solution.path_to_goal))
+            solution.statistics = statistics
+        return solution
     
     @staticmethod
     def draw(state):
         """Returns a string representation of a state"""
-        return '{} {} {}\n{} {} {}\n{} {} {}'.format(*state)
+        width = Board.width(state)
+        padding = len(str(len(state) - 1))
+        rows = (state[index:index + width] for index in range(0, len(state), width))
+        return '\n'.join(' '.join(str(tile).rjust(padding) for tile in row) for row in rows)
+
+class GoalMapping:
+    # every symmetry of the square as a map of (row, column), given the last row and column index
+    SYMMETRIES = (
+        lambda row, column, last: (row, column),
+        lambda row, column, last: (column, last - row),
+        lambda row, column, last: (last - row, last - column),
+        lambda row, column, last: (last - column, row),
+        lambda row, column, last: (row, last - column),
+        lambda row, column, last: (last - row, column),
+        lambda row, column, last: (column, row),
+        lambda row, column, last: (last - column, last - row)
+    )
+    OFFSETS = {'U': (-1, 0), 'D': (1, 0), 'L': (0, -1), 'R': (0, 1)}
+    
+    def __init__(self, goal):
+        width = Board.width(goal)
+        if width * width != len(goal) or sorted(goal) != [*range(len(goal))]:
+            raise ValueError(f'{goal} is not a square board of the tiles 0 to n - 1')
+        last = width - 1
+        
+        # the board is turned so the goal's blank lands on index 0, which only works from a corner
+        blank_row, blank_column = Board.translate_to_2D(goal.index(0), width)
+        for symmetry in self.SYMMETRIES:
+            if symmetry(blank_row, blank_column, last) == (0, 0):
+                break
+        else:
+            raise ValueError(f'{goal} has its blank off the corners, where no symmetry can move it to index 0')
+        self.cells = tuple(
+            row * width + column
+            for row, column in (symmetry(*Board.translate_to_2D(index, width), last) for index in range(len(goal)))
+            )
+        
+        # each tile is then relabeled with the index it has in the turned goal, making that goal canonical
+        self.labels = [0] * len(goal)
+        for index, tile in enumerate(goal):
+            self.labels[tile] = self.cells[index]
+        
+        # a move of the blank turns with the board, so canonical actions are turned back one by one
+        origin = symmetry(0, 0, last)
+        self.goal_actions = {}
+        for action, (row, column) in self.OFFSETS.items():
+            turned_row, turned_column = symmetry(row, column, last)
+            offset = (turned_row - origin[0], turned_column - origin[1])
+            canonical_action = next(other for other, other_offset in self.OFFSETS.items() if other_offset == offset)
+            self.goal_actions[canonical_action] = action
+    
+    def to_canonical(self, state):
+        """Returns the state turned and relabeled the way the goal is"""
+        canonical = [0] * len(state)
+        for index, tile in enumerate(state):
+            canonical[self.cells[index]] = self.labels[tile]
+        return tuple(canonical)
+    
+    def to_goal_actions(self, actions):
+        """Returns the actions of the original board for actions solving its canonical form"""
+        return tuple(self.goal_actions[action] for action in actions)
+
+class Puzzle:
+    def __init__(self, width):
+        self.width = width
+        self.size = width * width
+        # a packed state holds a fixed number of bits per cell, with cell 0 in the lowest bits
+        self.bits = max(4, (self.size - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        # other goals, such as (1, 2, 3, 4, 5, 6, 7, 8, 0), are solved by mapping them onto this one
+        self.goal = tuple(range(self.size))
+        self.packed_goal = self.pack(self.goal)
+        self.moves = self.build_move_table()
+        self.distances = self.build_distance_table()
+        self.manhattan = ManhattanHeuristic(self)
+    
+    def pack(self, state):
+        """Returns the packed integer equivalent of a state"""
+        packed = 0
+        for index, tile in enumerate(state):
+            packed |= tile << (index * self.bits)
+        return packed
+    
+    def unpack(self, packed):
+        """Returns the tuple equivalent of a packed state"""
+        return tuple((packed >> (index * self.bits)) & self.mask for index in range(self.size))
+    
+    def build_move_table(self):
+        """Returns the (action, new blank index, tile shift, blank shift) moves of every blank index"""
+        offsets = {'U': -self.width, 'D': self.width, 'L': -1, 'R': 1}
+        move_table = []
+        for blank_index in range(self.size):
+            moves = []
+            # valid_actions only looks at where the blank is
+            for action in Board.valid_actions((1,) * blank_index + (0,) + (1,) * (self.size - blank_index - 1)):
+                new_index = blank_index + offsets[action]
+                moves.append((action, new_index, new_index * self.bits, blank_index * self.bits))
+            move_table.append(tuple(moves))
+        return tuple(move_table)
+    
+    def build_distance_table(self):
+        """Returns the manhattan distance of every tile at every index to its goal index"""
+        distance_table = []
+        for tile in range(self.size):
+            goal_x, goal_y = Board.translate_to_2D(self.goal.index(tile), self.width)
+            distance_table.append(tuple(
+                0 if tile == 0 else Board.manhattan_distance(*Board.translate_to_2D(index, self.width), goal_x, goal_y)
+                for index in range(self.size)
+                ))
+        return tuple(distance_table)
+    
+    def successors(self, packed, blank_index):
+        """Generates the (action, packed state, blank index) children of a packed state"""
+        mask = self.mask
+        for action, new_index, tile_shift, blank_shift in self.moves[blank_index]:
+            tile = (packed >> tile_shift) & mask
+            yield action, packed ^ (tile << tile_shift) ^ (tile << blank_shift), new_index
+
+class ManhattanHeuristic:
+    # update() never looks at the tiles, so nodes skip unpacking their state for it
+    needs_tiles = False
+    
+    def __init__(self, puzzle):
+        self.distances = puzzle.distances
+    
+    def evaluate(self, tiles):
+        """Returns the manhattan distance sum of a state"""
+        return sum(self.distances[tile][index] for index, tile in enumerate(tiles))
+    
+    def update(self, h, tiles, tile, old_index, new_index):
+        """Returns the heuristic after a tile moves, given the heuristic before it"""
+        distances = self.distances[tile]
+        return h + distances[new_index] - distances[old_index]
 
 class Node:
     def __init__(self, parent=None, depth=0):
@@ -105,114 +306,803 @@ class Node:
             yield curr_node
             curr_node = curr_node.parent
 
+class HashedClosedSet(set):
+    # a plain set of packed states, so membership tests never leave C
+    def __init__(self, puzzle):
+        super().__init__()
+
+class BitmapClosedSet:
+    def __init__(self, puzzle):
+        if factorial(puzzle.size) > MAX_BITMAP_STATES:
+            raise ValueError(f'{puzzle.width}x{puzzle.width} boards have too many states for a bitmap')
+        self.low_ranks, self.high_ranks, self.low_bits = self.build_rank_tables(puzzle.width)
+        self.low_mask = (1 << self.low_bits) - 1
+        self.visited = bytearray(factorial(puzzle.size))
+        self.size = 0
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def build_rank_tables(width):
+        """Returns the lehmer rank parts of the low and high halves of every packed state, and the low half's bit count"""
+        puzzle = Board.puzzle(width)
+        size = puzzle.size
+        split = size // 2
+        
+        # a low cell's digit is its tile minus the smaller tiles before it, all of which are low cells too
+        low_ranks = {}
+        for tiles in permutations(range(size), split):
+            packed = sum(tile << (index * puzzle.bits) for index, tile in enumerate(tiles))
+            low_ranks[packed] = sum(
+                (tile - sum(1 for earlier in tiles[:index] if earlier < tile)) * factorial(size - 1 - index)
+                for index, tile in enumerate(tiles)
+                )
+        
+        # a high cell's digit counts the smaller tiles after it, all of which are high cells too
+        high_ranks = {}
+        for tiles in permutations(range(size), size - split):
+            packed = sum(tile << (index * puzzle.bits) for index, tile in enumerate(tiles))
+            high_ranks[packed] = sum(
+                sum(1 for later in tiles[index + 1:] if later < tile) * factorial(size - 1 - split - index)
+                for index, tile in enumerate(tiles)
+                )
+        return low_ranks, high_ranks, split * puzzle.bits
+    
+    def rank(self, state):
+        """Returns the lehmer rank of a packed state"""
+        return self.low_ranks[state & self.low_mask] + self.high_ranks[state >> self.low_bits]
+    
+    def add(self, state):
+        """Marks a packed state as visited"""
+        # the rank is inlined here and below, as these run once per generated node
+        rank = self.low_ranks[state & self.low_mask] + self.high_ranks[state >> self.low_bits]
+        if not self.visited[rank]:
+            self.visited[rank] = 1
+            self.size += 1
+    
+    def __contains__(self, state):
+        return self.visited[self.low_ranks[state & self.low_mask] + self.high_ranks[state >> self.low_bits]] == 1
+    
+    def __len__(self):
+        return self.size
+
+class HeapFrontier:
+    def __init__(self, priority=None):
+        # without a priority nodes compare themselves, otherwise ties go to the lower heuristic and then the older node
+        self.priority = priority
+        self.nodes = []
+        self.counter = count()
+    
+    def push(self, node):
+        """Adds a node to the frontier"""
+        if self.priority is None:
+            heapq.heappush(self.nodes, node)
+        else:
+            heapq.heappush(self.nodes, (self.priority(node), node.h, next(self.counter), node))
+    
+    def pop(self):
+        """Removes and returns the node of lowest cost"""
+        entry = heapq.heappop(self.nodes)
+        return entry if self.priority is None else entry[3]
+    
+    def __iter__(self):
+        return iter(self.nodes) if self.priority is None else (entry[3] for entry in self.nodes)
+    
+    def __len__(self):
+        return len(self.nodes)
+
+class BucketFrontier:
+    def __init__(self, priority=None):
+        # priorities index the buckets, so they have to be small non-negative integers, f by default
+        self.priority = priority
+        # buckets[f][h] is a stack, so ties on f go to the lowest h and then to the newest node
+        self.buckets = []
+        self.counts = []
+        self.min_f = 0
+        self.size = 0
+    
+    def push(self, node):
+        """Adds a node to the frontier"""
+        f, h = node.f if self.priority is None else self.priority(node), node.h
+        if not isinstance(f, int):
+            raise ValueError(f'bucket priorities must be integers, not {f!r}, so weights have to be whole numbers')
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+            self.counts.append(0)
+        row = self.buckets[f]
+        while len(row) <= h:
+            row.append([])
+        row[h].append(node)
+        self.counts[f] += 1
+        self.size += 1
+        # an inconsistent heuristic can push below the current minimum
+        if f < self.min_f:
+            self.min_f = f
+    
+    def pop(self):
+        """Removes and returns the node of lowest f, breaking ties on lowest h and then last in"""
+        counts = self.counts
+        while not counts[self.min_f]:
+            self.min_f += 1
+        counts[self.min_f] -= 1
+        self.size -= 1
+        for stack in self.buckets[self.min_f]:
+            if stack:
+                return stack.pop()
+    
+    def __iter__(self):
+        return (node for row in self.buckets for stack in row for node in stack)
+    
+    def __len__(self):
+        return self.size
+
+class NodeStore:
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        # packed states of boards up to 4x4 fit an unsigned 64-bit array, larger ones fall back to a list
+        self.states = array('Q') if puzzle.bits * puzzle.size <= 64 else []
+        self.parents = array('l')
+        self.action_codes = array('b')
+        self.depths = array('H')
+        self.blank_indices = array('B')
+    
+    def add(self, state, parent=-1, action=None, blank_index=0):
+        """Stores a node and returns its index"""
+        self.states.append(state)
+        self.parents.append(parent)
+        self.action_codes.append(-1 if action is None else ACTION_CODES.index(action))
+        self.depths.append(0 if parent < 0 else self.depths[parent] + 1)
+        self.blank_indices.append(blank_index)
+        return len(self.states) - 1
+    
+    def actions(self, index):
+        """Returns the actions leading from the root to a node by walking its parent indices"""
+        actions = []
+        while self.parents[index] >= 0:
+            actions.append(ACTION_CODES[self.action_codes[index]])
+            index = self.parents[index]
+        return tuple(actions[::-1])
+    
+    def __len__(self):
+        return len(self.states)
+
+class StoredNode:
+    # a handle to one node of a NodeStore, so solvers can return it like a BoardNode
+    __slots__ = ('store', 'index')
+    
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    
+    @property
+    def state(self):
+        """Returns the packed state"""
+        return self.store.states[self.index]
+    
+    @property
+    def depth(self):
+        """Returns the number of moves from the root"""
+        return self.store.depths[self.index]
+    
+    def tiles(self):
+        """Returns the tuple equivalent of the packed state"""
+        return self.store.puzzle.unpack(self.state)
+    
+    def actions(self):
+        """Returns all the action of the ancestor states"""
+        return self.store.actions(self.index)
+    
+    def is_goal(self):
+        """Checks if current state is equal to the goal state"""
+        return self.state == self.store.puzzle.packed_goal
+    
+    def __str__(self):
+        """Returns the string representation of the state"""
+        return Board.draw(self.tiles())
+    
+    def __repr__(self):
+        """Returns the actual representation of the state"""
+        return f'Board(state={self.tiles()}, depth={self.depth})'
+
 class BoardNode(Node):
-    def __init__(self, state, action=None, parent=None, depth=0):
+    def __init__(self, state, action=None, parent=None, depth=0, blank_index=None, puzzle=None, heuristic=None):
         super().__init__(parent, depth)
         self.state = state
         self.action = action
-        self.goal = tuple(range(9)) #(1, 2, 3, 4, 5, 6, 7, 8, 0)
-        self.heuristic_func = Board.manhattan_distance
+        
+        if parent is None:
+            self.puzzle = puzzle or Board.puzzle()
+            self.heuristic = heuristic or self.puzzle.manhattan
+            self.blank_index = blank_index if blank_index is not None else self.tiles().index(0)
+            self.h = self.heuristic.evaluate(self.tiles())
+        else:
+            self.puzzle = parent.puzzle
+            self.heuristic = parent.heuristic
+            self.blank_index = blank_index
+            # only the tile moved into the parent's blank index changes the heuristic
+            tile = (state >> (parent.blank_index * self.puzzle.bits)) & self.puzzle.mask
+            tiles = self.tiles() if self.heuristic.needs_tiles else None
+            self.h = self.heuristic.update(parent.h, tiles, tile, blank_index, parent.blank_index)
+        self.f = self.depth + self.h
+    
+    @classmethod
+    def from_state(cls, state, heuristic=None):
+        """Returns a root node of a tuple state"""
+        puzzle = Board.puzzle(Board.width(state))
+        return cls(puzzle.pack(state), blank_index=state.index(0), puzzle=puzzle, heuristic=heuristic)
+    
+    @property
+    def goal(self):
+        """Returns the goal state"""
+        return self.puzzle.goal
+    
+    def tiles(self):
+        """Returns the tuple equivalent of the packed state"""
+        return self.puzzle.unpack(self.state)
     
     def cost(self):
         """Returns the heuristic cost of the state"""
-        heuristic_sum = 0
-        for index, item in enumerate(self.state):
-            curr_x, curr_y = Board.translate_to_2D(index)
-            goal_x, goal_y = Board.translate_to_2D(self.goal.index(item))
-            heuristic_sum += self.heuristic_func(curr_x, curr_y, goal_x, goal_y)
-        return heuristic_sum + self.depth
+        return self.f
     
     def expand(self):
         """Expand valid actions as the children of the current state"""
         if not self.nodes:
-            for action in Board.valid_actions(self.state):
+            for action, state, blank_index in self.puzzle.successors(self.state, self.blank_index):
                 self.add_node(BoardNode(
-                    Board.transform(self.state, action),
+                    state,
                     parent=self,
                     action=action,
-                    depth=self.depth + 1
+                    depth=self.depth + 1,
+                    blank_index=blank_index
                     ))
     
+    def follow(self, actions):
+        """Returns the descendant node reached by applying a sequence of actions"""
+        node = self
+        for action in actions:
+            for child_action, state, blank_index in self.puzzle.successors(node.state, node.blank_index):
+                if child_action == action:
+                    node = BoardNode(state, parent=node, action=action, depth=node.depth + 1, blank_index=blank_index)
+                    break
+        return node
+    
     def actions(self):
         """Returns all the action of the ancestor states"""
         return tuple(node.action for node in self.iterate_ancestors())[-2::-1]
     
     def is_goal(self):
         """Checks if current state is equal to the goal state"""
-        return self.state == self.goal
+        return self.state == self.puzzle.packed_goal
     
     def __lt__(self, other):
         """Checks if cost of current state is less than the cost of the other state"""
-        return self.cost() < other.cost()
+        return self.f < other.f
     
     def __eq__(self, other):
         """Checks if cost of current state is equal to the cost of the other state"""
-        return self.cost() == other.cost()
+        return self.f == other.f
     
     def __str__(self):
         """Returns the string representation of the state"""
-        return Board.draw(self.state)
+        return Board.draw(self.tiles())
     
     def __repr__(self):
         """Returns the actual representation of the state"""
-        return f'Board(state={self.state}, action={self.action}, depth={self.depth})'
+        return f'Board(state={self.tiles()}, action={self.action}, depth={self.depth})'
 
-def A_STAR(start_node):
-    """Returns the goal node"""
-    frontier = []
-    explored_nodes = set()
+class Solution(namedtuple('Solution', ['path_to_goal', 'nodes_expanded', 'max_search_depth', 'time_elapsed'])):
+    # unpacks like the plain 4-tuple, with the full SearchStatistics attached as .statistics
+    statistics = None
+
+class SearchStatistics:
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.max_search_depth = 0
+        self.time_elapsed = 0
+        self.peak_frontier = 0
+        self.explored_size = 0
+        self.duplicate_hits = 0
+        self.peak_memory = None
+        # how many times the optimal length the path may be, 1 for optimal solvers and None when unbounded
+        self.bound = 1
+    
+    def record(self, peak_frontier, explored_size, duplicate_hits):
+        """Stores the counters a search kept while running"""
+        self.peak_frontier = peak_frontier
+        self.explored_size = explored_size
+        self.duplicate_hits = duplicate_hits
+    
+    def as_dict(self):
+        """Returns the statistics as a dictionary"""
+        return dict(vars(self))
+    
+    def __repr__(self):
+        """Returns the actual representation of the statistics"""
+        return 'SearchStatistics({})'.format(', '.join(f'{key}={value}' for key, value in vars(self).items()))
+
+class CancellationToken:
+    def __init__(self):
+        self.cancelled = False
+    
+    def cancel(self):
+        """Asks every search holding the token to stop before its next slice"""
+        self.cancelled = True
+
+class SearchTask:
+    def __init__(self, state, func, heuristic=None, observer=None, slice_size=500, token=None, slice_time=0.02, **options):
+        self.start_node = BoardNode.from_state(state, Board.resolve_heuristic(heuristic, Board.width(state)))
+        self.statistics = SearchStatistics()
+        self.observer = observer
+        # a slice ends after slice_size yields or slice_time seconds, since some searches do far more work per yield
+        self.slice_size = slice_size
+        self.slice_time = slice_time
+        self.token = token or CancellationToken()
+        self.trace_memory = False
+        self.solution = None
+        self.is_finished = False
+        
+        search = getattr(func, 'search', None) or blocking_search(func)
+        self.generator = search(self.start_node, observer=observer, statistics=self.statistics, **options)
+    
+    def step(self):
+        """Advances the search by one slice, returning True once it is solved, exhausted or cancelled"""
+        if self.is_finished:
+            return True
+        if self.token.cancelled:
+            self.generator.close()
+            self.is_finished = True
+            return True
+        
+        start_time = time.perf_counter()
+        deadline = start_time + self.slice_time
+        try:
+            for _ in range(self.slice_size):
+                next(self.generator)
+                if time.perf_counter() > deadline:
+                    break
+        except StopIteration as stop:
+            self.statistics.time_elapsed += time.perf_counter() - start_time
+            self.finish(stop.value)
+        else:
+            self.statistics.time_elapsed += time.perf_counter() - start_time
+        return self.is_finished
+    
+    def finish(self, result):
+        """Builds the solution out of the (final node, nodes expanded, max search depth) of a search"""
+        self.is_finished = True
+        if self.trace_memory:
+            self.statistics.peak_memory = tracemalloc.get_traced_memory()[1]
+        if result is None:
+            return
+        
+        final_node, nodes_expanded, max_search_depth = result
+        self.statistics.nodes_expanded = nodes_expanded
+        self.statistics.max_search_depth = max_search_depth
+        if self.observer is not None:
+            self.observer.finished(self.statistics)
+        
+        self.solution = Solution(final_node.actions(), nodes_expanded, max_search_depth, self.statistics.time_elapsed)
+        self.solution.statistics = self.statistics
+    
+    def cancel(self):
+        """Stops the search before its next slice"""
+        self.token.cancel()
+    
+    def run(self, trace_memory=False):
+        """Runs the remaining slices, returning the solution or None"""
+        self.trace_memory = trace_memory
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            while not self.step():
+                pass
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+        return self.solution
+    
+    def schedule(self, widget, on_finish, interval=1):
+        """Runs one slice per tkinter after() callback, then calls on_finish unless cancelled"""
+        def run_slice():
+            if not self.step():
+                widget.after(interval, run_slice)
+            elif not self.token.cancelled:
+                on_finish(self)
+        widget.after(interval, run_slice)
+
+def resumable(search):
+    """Returns a solver running a generator search to completion, keeping the generator as .search"""
+    @wraps(search)
+    def solver(start_node, observer=None, statistics=None, **options):
+        generator = search(start_node, observer=observer, statistics=statistics, **options)
+        try:
+            while True:
+                next(generator)
+        except StopIteration as stop:
+            return stop.value
+    solver.search = search
+    return solver
+
+def blocking_search(func):
+    """Returns a single-slice generator search of a plain solver"""
+    def search(start_node, observer=None, statistics=None, **options):
+        return func(start_node, observer=observer, statistics=statistics, **options)
+        yield
+    return search
+
+class SearchObserver:
+    def __init__(self, interval=1):
+        # solvers only call expanded() on every interval-th expansion
+        self.interval = interval
+    
+    def expanded(self, state, depth, frontier_size, explored_size, bound):
+        """Receives a sampled expansion of a packed state"""
+    
+    def finished(self, statistics):
+        """Receives the statistics of a finished search"""
+
+class RecordingObserver(SearchObserver):
+    def __init__(self, interval=1):
+        super().__init__(interval)
+        self.events = []
+        self.statistics = None
+    
+    def expanded(self, state, depth, frontier_size, explored_size, bound):
+        """Records a sampled expansion along with its time"""
+        self.events.append((time.perf_counter(), state, depth, frontier_size, explored_size, bound))
+    
+    def finished(self, statistics):
+        """Records the statistics of a finished search"""
+        self.statistics = statistics
+
+def best_first_search(start_node, observer=None, statistics=None, priority=None, frontier=HeapFrontier, closed_set=None, prune=None, is_final=None, stop=None):
+    """Generates once per expansion of a search popping the lowest priority first, returning the final node or None, nodes expanded and max search depth"""
+    statistics = statistics or SearchStatistics()
+    frontier = frontier(priority)
+    # a closed set shuts states on their first pop, otherwise states are reopened when reached by a shorter path
+    explored_nodes = closed_set(start_node.puzzle) if closed_set is not None else None
+    best_depths = {start_node.state: 0}
     nodes_expanded = 0
     max_search_depth = 0
+    peak_frontier = 0
+    duplicate_hits = 0
+    push = frontier.push
+    pop = frontier.pop
     
-    heapq.heappush(frontier, start_node)
+    push(start_node)
     
     while frontier:
-        node = heapq.heappop(frontier)
-        explored_nodes.add(node.state)
+        if stop is not None and stop():
+            break
+        
+        node = pop()
+        if explored_nodes is None:
+            if node.depth > best_depths[node.state]:
+                duplicate_hits += 1
+                continue
+        elif node.state in explored_nodes:
+            duplicate_hits += 1
+            continue
+        else:
+            explored_nodes.add(node.state)
         
-        if node.is_goal():
+        if node.is_goal() if is_final is None else is_final(node):
+            statistics.record(peak_frontier, len(best_depths if explored_nodes is None else explored_nodes), duplicate_hits)
             return node, nodes_expanded, max_search_depth
+        if prune is not None and prune(node):
+            continue
         
         node.expand()
         nodes_expanded += 1
+        yield
+        
+        if observer is not None and nodes_expanded % observer.interval == 0:
+            explored_size = len(best_depths if explored_nodes is None else explored_nodes)
+            observer.expanded(node.state, node.depth, len(frontier), explored_size, node.f if priority is None else priority(node))
         
         for neighbor in node.nodes:
-            if neighbor.state not in explored_nodes:
-                heapq.heappush(frontier, neighbor)
-                explored_nodes.add(neighbor.state)
-                
-                if neighbor.depth > max_search_depth:
-                    max_search_depth = neighbor.depth
+            if prune is not None and prune(neighbor):
+                continue
+            if explored_nodes is None:
+                if neighbor.depth >= best_depths.get(neighbor.state, neighbor.depth + 1):
+                    duplicate_hits += 1
+                    continue
+                best_depths[neighbor.state] = neighbor.depth
+            elif neighbor.state in explored_nodes:
+                duplicate_hits += 1
+                continue
+            push(neighbor)
+            
+            if neighbor.depth > max_search_depth:
+                max_search_depth = neighbor.depth
+        
+        if len(frontier) > peak_frontier:
+            peak_frontier = len(frontier)
+    
+    statistics.record(peak_frontier, len(best_depths if explored_nodes is None else explored_nodes), duplicate_hits)
+    return None, nodes_expanded, max_search_depth
+
+def integral_weight(weight):
+    """Returns a weight as an int when it is a whole number, so weighted priorities can index buckets"""
+    return int(weight) if weight == int(weight) else weight
+
+@resumable
+def A_STAR(start_node, observer=None, statistics=None, closed_set=HashedClosedSet, frontier=HeapFrontier):
+    """Returns the goal node"""
+    final_node, nodes_expanded, max_search_depth = yield from best_first_search(
+        start_node, observer, statistics, frontier=frontier, closed_set=closed_set
+        )
+    return (final_node, nodes_expanded, max_search_depth) if final_node is not None else None
+
+@resumable
+def A_STAR_INCREMENTAL(start_node, observer=None, statistics=None, frontier=HeapFrontier):
+    """Returns the goal node"""
+    # plain priorities keep heap comparisons out of python methods, and states are reopened, which inconsistent heuristics need
+    final_node, nodes_expanded, max_search_depth = yield from best_first_search(
+        start_node, observer, statistics, lambda node: node.f, frontier
+        )
+    return (final_node, nodes_expanded, max_search_depth) if final_node is not None else None
+
+@resumable
+def WEIGHTED_A_STAR(start_node, observer=None, statistics=None, weight=2, closed_set=HashedClosedSet, frontier=HeapFrontier):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    # with a consistent heuristic the path is at most weight times the optimal length
+    statistics.bound = weight
+    weight = integral_weight(weight)
+    final_node, nodes_expanded, max_search_depth = yield from best_first_search(
+        start_node, observer, statistics, lambda node: node.depth + weight * node.h, frontier, closed_set
+        )
+    return (final_node, nodes_expanded, max_search_depth) if final_node is not None else None
+
+@resumable
+def GREEDY(start_node, observer=None, statistics=None, closed_set=HashedClosedSet, frontier=HeapFrontier):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    statistics.bound = None
+    final_node, nodes_expanded, max_search_depth = yield from best_first_search(
+        start_node, observer, statistics, lambda node: node.h, frontier, closed_set
+        )
+    return (final_node, nodes_expanded, max_search_depth) if final_node is not None else None
+
+@resumable
+def ANYTIME_A_STAR(start_node, observer=None, statistics=None, weight=3, budget=1, frontier=HeapFrontier):
+    """Returns the best goal node found within the budget in seconds"""
+    statistics = statistics or SearchStatistics()
+    deadline = time.perf_counter() + budget
+    weight = integral_weight(weight)
+    open_nodes = frontier(lambda node: node.depth + weight * node.h)
+    incumbent = None
+    
+    def is_final(node):
+        # a goal only replaces the incumbent, the search goes on looking for a shorter one
+        nonlocal incumbent
+        if node.is_goal() and (incumbent is None or node.depth < incumbent.depth):
+            incumbent = node
+        return False
+    
+    def prune(node):
+        # nothing reached through a node whose unweighted cost is no better than the incumbent can improve on it
+        return incumbent is not None and node.f >= incumbent.depth
+    
+    def stop():
+        # the first solution is always waited for, later ones only while the budget lasts
+        return incumbent is not None and time.perf_counter() > deadline
+    
+    # the open nodes are kept, since what is left of them bounds the incumbent's length
+    _, nodes_expanded, max_search_depth = yield from best_first_search(
+        start_node, observer, statistics, open_nodes.priority, lambda _: open_nodes, prune=prune, is_final=is_final, stop=stop
+        )
+    if incumbent is None:
+        return None
+    
+    # the lowest unweighted cost left open bounds the optimal length from below
+    lower_bound = min(min((node.f for node in open_nodes), default=incumbent.depth), incumbent.depth)
+    statistics.bound = incumbent.depth / lower_bound if lower_bound else 1
+    return incumbent, nodes_expanded, max_search_depth
+
+@resumable
+def IDA_STAR(start_node, observer=None, statistics=None):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    puzzle = start_node.puzzle
+    heuristic = start_node.heuristic
+    tiles = [*start_node.tiles()]
+    goal = [*puzzle.goal]
+    path = []
+    nodes_expanded = 0
+    max_search_depth = 0
     
+    if start_node.h == 0 and tiles == goal:
+        statistics.record(0, 0, 0)
+        return start_node, nodes_expanded, max_search_depth
+    # the bound would grow forever on a state that cannot reach the goal
+    if not Board.is_solvable(start_node.tiles()):
+        statistics.record(0, 0, 0)
+        return None
+    
+    # heuristics that keep table indices hand each frame a shifted copy, so unmaking a move needs no update
+    start_indices = heuristic.indices(tiles) if hasattr(heuristic, 'indices') else None
+    
+    bound = start_node.h
+    while bound != float('inf'):
+        next_bound = float('inf')
+        nodes_expanded += 1
+        yield
+        
+        # each frame holds a blank index, its heuristic, its remaining moves, the move that led to it and its table indices
+        stack = [(start_node.blank_index, start_node.h, iter(puzzle.moves[start_node.blank_index]), None, start_indices)]
+        while stack:
+            blank_index, h, moves, previous_action, group_indices = stack[-1]
+            for action, new_index, _, _ in moves:
+                if action != OPPOSITE_ACTIONS[previous_action]:
+                    break
+            else:
+                # every move of the frame is searched, so unmake the move that led to it
+                stack.pop()
+                if stack:
+                    path.pop()
+                    parent_index = stack[-1][0]
+                    tiles[blank_index], tiles[parent_index] = tiles[parent_index], 0
+                continue
+            
+            # make the move in place, it is unmade once its subtree is searched
+            tile = tiles[new_index]
+            tiles[blank_index], tiles[new_index] = tile, 0
+            if group_indices is None:
+                child_h = heuristic.update(h, tiles, tile, new_index, blank_index)
+                child_indices = None
+            else:
+                child_h, child_indices = heuristic.moved(group_indices, tile, new_index, blank_index)
+            depth = len(path) + 1
+            
+            if depth > max_search_depth:
+                max_search_depth = depth
+            
+            if depth + child_h > bound:
+                next_bound = min(next_bound, depth + child_h)
+                tiles[blank_index], tiles[new_index] = 0, tile
+                continue
+            
+            path.append(action)
+            if child_h == 0 and tiles == goal:
+                statistics.record(max_search_depth, 0, 0)
+                return start_node.follow(path), nodes_expanded, max_search_depth
+            
+            nodes_expanded += 1
+            
+            # the frontier of a depth-first search is its current path
+            if observer is not None and nodes_expanded % observer.interval == 0:
+                observer.expanded(puzzle.pack(tiles), depth, len(path), 0, bound)
+            
+            yield
+            stack.append((new_index, child_h, iter(puzzle.moves[new_index]), action, child_indices))
+        
+        bound = next_bound
+    
+    statistics.record(max_search_depth, 0, 0)
     return None
 
-def BFS(start_node):
+@resumable
+def BFS(start_node, observer=None, statistics=None, closed_set=HashedClosedSet):
     """Returns the goal node"""
-    frontier = deque()
-    explored_nodes = set()
+    statistics = statistics or SearchStatistics()
+    puzzle = start_node.puzzle
+    packed_goal = puzzle.packed_goal
+    store = NodeStore(puzzle)
+    explored_nodes = closed_set(puzzle)
     nodes_expanded = 0
     max_search_depth = 0
+    peak_frontier = 0
+    duplicate_hits = 0
     
-    frontier.append(start_node)
+    # nodes are stored in the order they are queued, so the frontier is everything past the head
+    store.add(start_node.state, blank_index=start_node.blank_index)
+    explored_nodes.add(start_node.state)
+    head = 0
     
-    while frontier:
-        node = frontier.popleft()
-        explored_nodes.add(node.state)
+    while head < len(store):
+        state = store.states[head]
         
-        if node.is_goal():
-            return node, nodes_expanded, max_search_depth
+        if state == packed_goal:
+            statistics.record(peak_frontier, len(explored_nodes), duplicate_hits)
+            return StoredNode(store, head), nodes_expanded, max_search_depth
         
-        node.expand()
         nodes_expanded += 1
+        yield
         
-        for neighbor in node.nodes:
-            if neighbor.state not in explored_nodes:
-                frontier.append(neighbor)
-                explored_nodes.add(neighbor.state)
+        depth = store.depths[head]
+        if observer is not None and nodes_expanded % observer.interval == 0:
+            observer.expanded(state, depth, len(store) - head - 1, len(explored_nodes), depth)
+        
+        for action, child, blank_index in puzzle.successors(state, store.blank_indices[head]):
+            if child not in explored_nodes:
+                store.add(child, head, action, blank_index)
+                explored_nodes.add(child)
                 
-                if neighbor.depth > max_search_depth:
-                    max_search_depth = neighbor.depth
+                if depth + 1 > max_search_depth:
+                    max_search_depth = depth + 1
+            else:
+                duplicate_hits += 1
+        
+        head += 1
+        if len(store) - head > peak_frontier:
+            peak_frontier = len(store) - head
+    
+    statistics.record(peak_frontier, len(explored_nodes), duplicate_hits)
+    return None
+
+@resumable
+def BIDIRECTIONAL_BFS(start_node, observer=None, statistics=None):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    if start_node.is_goal():
+        return start_node, 0, 0
+    
+    puzzle = start_node.puzzle
+    
+    # each side maps a visited state to the (parent state, action) that reached it
+    forward = {start_node.state: None}
+    backward = {puzzle.packed_goal: None}
+    forward_layer = [(start_node.state, start_node.blank_index)]
+    backward_layer = [(puzzle.packed_goal, puzzle.goal.index(0))]
+    forward_depth = 0
+    backward_depth = 0
+    nodes_expanded = 0
+    peak_frontier = 0
+    duplicate_hits = 0
+    
+    def chain(visited, state):
+        """Returns the actions leading from the root of a side to a state"""
+        actions = []
+        while visited[state] is not None:
+            state, action = visited[state]
+            actions.append(action)
+        return actions[::-1]
     
+    while forward_layer and backward_layer:
+        is_forward = len(forward_layer) <= len(backward_layer)
+        layer, visited, other = (forward_layer, forward, backward) if is_forward else (backward_layer, backward, forward)
+        depth = forward_depth if is_forward else backward_depth
+        
+        next_layer = []
+        meetings = []
+        for state, blank_index in layer:
+            nodes_expanded += 1
+            yield
+            
+            if observer is not None and nodes_expanded % observer.interval == 0:
+                observer.expanded(state, depth, len(forward_layer) + len(backward_layer), len(forward) + len(backward), forward_depth + backward_depth)
+            
+            for action, child, child_blank in puzzle.successors(state, blank_index):
+                if child not in visited:
+                    visited[child] = (state, action)
+                    next_layer.append((child, child_blank))
+                    if child in other:
+                        meetings.append(child)
+                else:
+                    duplicate_hits += 1
+        
+        if is_forward:
+            forward_layer = next_layer
+            forward_depth += 1
+        else:
+            backward_layer = next_layer
+            backward_depth += 1
+        
+        if len(forward_layer) + len(backward_layer) > peak_frontier:
+            peak_frontier = len(forward_layer) + len(backward_layer)
+        
+        if meetings:
+            # the whole layer is expanded first so the shortest joined path can be picked
+            paths = []
+            for meeting in meetings:
+                backward_actions = chain(backward, meeting)
+                paths.append(chain(forward, meeting) + [OPPOSITE_ACTIONS[action] for action in reversed(backward_actions)])
+            path = min(paths, key=len)
+            statistics.record(peak_frontier, len(forward) + len(backward), duplicate_hits)
+            return start_node.follow(path), nodes_expanded, forward_depth + backward_depth
+    
+    statistics.record(peak_frontier, len(forward) + len(backward), duplicate_hits)
     return None
 
 if __name__ == '__main__':
@@ -227,6 +1117,16 @@ if __name__ == '__main__':
     
     print(f'Done in {round(time_elasped, 4)} second(s) with {len(path_to_goal)} moves using A*')
     print(f'Has a max search depth of {max_search_depth} and nodes expanded of {nodes_expanded}')
+    print(f'Expanded {round(nodes_expanded / max(time_elasped, 1e-9))} nodes/sec')
+    print('Actions:', *path_to_goal)
+    
+    # solved using incremental A*
+    print('\nFinding solution...')
+    path_to_goal, nodes_expanded, max_search_depth, time_elasped = Board.solve(start_state, A_STAR_INCREMENTAL)
+    
+    print(f'Done in {round(time_elasped, 4)} second(s) with {len(path_to_goal)} moves using incremental A*')
+    print(f'Has a max search depth of {max_search_depth} and nodes expanded of {nodes_expanded}')
+    print(f'Expanded {round(nodes_expanded / max(time_elasped, 1e-9))} nodes/sec')
     print('Actions:', *path_to_goal)
     
     # solved using BFS
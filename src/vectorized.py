@@ -0,0 +1,139 @@
+import time
+
+from src.utils import Board, SearchStatistics, ACTION_CODES, resumable
+
+# states expanded between yields, a few milliseconds of work
+CHUNK_SIZE = 2048
+
+def load_numpy():
+    """Returns the numpy module, which only the vectorized engine needs"""
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError('the vectorized BFS needs numpy, install it with pip install numpy') from error
+    return numpy
+
+def build_moves(puzzle):
+    """Returns the (can move, new blank index) arrays of every action code, indexed by blank index"""
+    np = load_numpy()
+    moves = []
+    for action in ACTION_CODES:
+        can_move = np.zeros(puzzle.size, dtype=bool)
+        new_indices = np.zeros(puzzle.size, dtype=np.uint64)
+        for blank_index, blank_moves in enumerate(puzzle.moves):
+            for move_action, new_index, _, _ in blank_moves:
+                if move_action == action:
+                    can_move[blank_index] = True
+                    new_indices[blank_index] = new_index
+        moves.append((can_move, new_indices))
+    return moves
+
+def expand_layer(puzzle, moves, states, blank_indices):
+    """Returns the (children, blank indices, parent positions, action codes) of every state of a layer"""
+    np = load_numpy()
+    bits = np.uint64(puzzle.bits)
+    mask = np.uint64(puzzle.mask)
+    children = []
+    for code, (can_move, new_indices) in enumerate(moves):
+        parents = np.flatnonzero(can_move[blank_indices])
+        parent_states = states[parents]
+        blank_shifts = blank_indices[parents].astype(np.uint64) * bits
+        new_blank_indices = new_indices[blank_indices[parents]]
+        tile_shifts = new_blank_indices * bits
+        
+        # the moved tile swaps places with the blank, whose bits are all zero
+        tiles = (parent_states >> tile_shifts) & mask
+        children.append((
+            parent_states ^ (tiles << tile_shifts) ^ (tiles << blank_shifts),
+            new_blank_indices.astype(np.uint8),
+            parents,
+            np.full(len(parents), code, dtype=np.int8)
+            ))
+    return tuple(np.concatenate(columns) for columns in zip(*children))
+
+def iterate_layers(puzzle, start_state, start_blank_index, chunk_size=CHUNK_SIZE):
+    """Generates the (states, blank indices, parent positions, action codes) of every breadth-first layer, and the number of states after every expanded chunk"""
+    np = load_numpy()
+    if puzzle.bits * puzzle.size > 64:
+        raise ValueError(f'{puzzle.width}x{puzzle.width} states do not fit in 64 bits')
+    moves = build_moves(puzzle)
+    
+    states = np.array([start_state], dtype=np.uint64)
+    blank_indices = np.array([start_blank_index], dtype=np.uint8)
+    previous_states = np.empty(0, dtype=np.uint64)
+    parents = np.array([-1])
+    codes = np.array([-1], dtype=np.int8)
+    
+    while len(states):
+        yield states, blank_indices, parents, codes
+        
+        # layers are expanded a chunk at a time, so a sliced search hands control back within a layer
+        chunks = []
+        for start in range(0, len(states), chunk_size):
+            end = min(start + chunk_size, len(states))
+            children, child_blank_indices, parents, codes = expand_layer(puzzle, moves, states[start:end], blank_indices[start:end])
+            chunks.append((children, child_blank_indices, parents + start, codes))
+            yield end - start
+        children, child_blank_indices, parents, codes = (np.concatenate(columns) for columns in zip(*chunks))
+        
+        # the move graph is bipartite, so a child is either new or already in the layer before its parent's
+        children, first = np.unique(children, return_index=True)
+        is_new = ~np.isin(children, previous_states, assume_unique=True)
+        previous_states = states
+        states = children[is_new]
+        first = first[is_new]
+        blank_indices = child_blank_indices[first]
+        parents = parents[first]
+        codes = codes[first]
+
+def traverse(width=3, start_state=None):
+    """Returns the number of states at every distance from a state, the goal by default"""
+    puzzle = Board.puzzle(width)
+    start_state = start_state or puzzle.goal
+    return [len(layer[0]) for layer in iterate_layers(puzzle, puzzle.pack(start_state), start_state.index(0)) if not isinstance(layer, int)]
+
+@resumable
+def VECTORIZED_BFS(start_node, observer=None, statistics=None):
+    """Returns the goal node"""
+    statistics = statistics or SearchStatistics()
+    np = load_numpy()
+    puzzle = start_node.puzzle
+    nodes_expanded = 0
+    peak_frontier = 0
+    explored_size = 0
+    history = []
+    
+    depth = -1
+    for layer in iterate_layers(puzzle, start_node.state, start_node.blank_index):
+        if isinstance(layer, int):
+            # observers sample once every interval expanded states, and at most once a chunk
+            if observer is not None and (nodes_expanded + layer) // observer.interval > nodes_expanded // observer.interval:
+                observer.expanded(int(states[0]), depth, len(states), explored_size, depth)
+            nodes_expanded += layer
+            yield
+            continue
+        
+        states, _, parents, codes = layer
+        depth += 1
+        history.append((parents, codes))
+        explored_size += len(states)
+        peak_frontier = max(peak_frontier, len(states))
+        
+        # layers come out sorted, so the goal is found by binary search
+        position = int(np.searchsorted(states, np.uint64(puzzle.packed_goal)))
+        if position < len(states) and states[position] == puzzle.packed_goal:
+            actions = []
+            for parents, codes in reversed(history[1:]):
+                actions.append(ACTION_CODES[codes[position]])
+                position = parents[position]
+            statistics.record(peak_frontier, explored_size, 0)
+            return start_node.follow(actions[::-1]), nodes_expanded, depth
+    
+    statistics.record(peak_frontier, explored_size, 0)
+    return None
+
+if __name__ == '__main__':
+    print('Traversing every solvable state...')
+    start_time = time.perf_counter()
+    layers = traverse()
+    print(f'Done in {round(time.perf_counter() - start_time, 4)} second(s) with {sum(layers)} states over {len(layers)} layers')